@@ -0,0 +1,99 @@
+"""Benchmark Worksheet.batch() against growing worksheets.
+
+Runs entirely offline: the gdata client is replaced by a stand-in which
+serves a synthetic cells feed and accepts batch requests without sending
+them anywhere, so the timings only measure the work done by Worksheet.
+
+    PYTHONPATH=. python benchmarks/batch_benchmark.py
+"""
+from __future__ import print_function
+
+import re
+import time
+
+try:
+    from urllib.parse import urlparse, parse_qsl
+except ImportError:
+    from urlparse import urlparse, parse_qsl
+
+import atom
+import gdata
+import gdata.spreadsheet
+
+from google_spreadsheet.api import Worksheet
+
+COLUMNS = 10
+UPDATE = re.compile(r'<gs:cell ([^>]*)inputValue="([^"]*)"/>')
+BATCH_URL = 'https://spreadsheets.google.com/feeds/cells/key/od6/private/full/batch'
+
+
+def make_cell(row, col, value):
+    cell_id = 'https://spreadsheets.google.com/feeds/cells/key/od6/private/full/R%sC%s' % (row, col)
+    return gdata.spreadsheet.SpreadsheetsCell(
+        atom_id=atom.Id(text=cell_id),
+        link=[atom.Link(rel='edit', href=cell_id + '/1')],
+        content=atom.Content(text=value),
+        cell=gdata.spreadsheet.Cell(row=str(row), col=str(col),
+            inputValue=value, text=value))
+
+
+class StubClient(object):
+    """A gdata client stand-in serving a rows x COLUMNS cells feed."""
+    server = 'spreadsheets.google.com'
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def Get(self, uri, converter=None):
+        # feeds are fetched by URI and parsed from their XML, as they would
+        # be from a response
+        query = dict(parse_qsl(urlparse(uri).query)) or None
+        return converter(self.GetCellsFeed('key', query=query).ToString())
+
+    def GetCellsFeed(self, key, wksht_id='default', cell=None, query=None):
+        feed = gdata.spreadsheet.SpreadsheetsCellsFeed(
+            link=[atom.Link(rel='http://schemas.google.com/g/2005#batch',
+                href=BATCH_URL)])
+        for r in range(1, self.rows + 1):
+            for c in range(1, COLUMNS + 1):
+                feed.entry.append(make_cell(r, c, 'r%sc%s' % (r, c)))
+        return feed
+
+    def request(self, operation, url, data=None, headers=None):
+        # batch requests only: the server answers with the updated cells,
+        # contents included
+        return StubResponse(UPDATE.sub(
+            r'<batch:status code="200" reason="Success"/>'
+            r'<content>\2</content><gs:cell \1inputValue="\2">\2</gs:cell>',
+            data))
+
+
+class StubResponse(object):
+    status = 200
+    reason = 'OK'
+
+    def __init__(self, body):
+        self.body = body
+
+    def read(self):
+        return self.body
+
+
+def run(rows):
+    sheet = Worksheet(StubClient(rows), 'key', 'od6')
+    # load every cell up front, only the batch itself is timed
+    sheet.cells
+    data = [['v%s' % c for c in range(COLUMNS)] for r in range(rows - 1)]
+    start = time.time()
+    sheet.batch((2, 1), (rows, COLUMNS), data)
+    return time.time() - start
+
+
+def main():
+    print('%10s %10s %12s' % ('rows', 'cells', 'batch (s)'))
+    for rows in (100, 500, 1000, 5000):
+        print('%10d %10d %12.3f' % (rows, rows * COLUMNS, run(rows)))
+
+
+if __name__ == '__main__':
+    main()
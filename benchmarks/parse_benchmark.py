@@ -0,0 +1,62 @@
+"""Benchmark parsing a cells feed into cell records.
+
+Compares the gdata object model with the streaming parser, on lxml when it
+is installed and on the standard library, for synthetic feeds of up to
+100,000 cells.
+
+    PYTHONPATH=. python benchmarks/parse_benchmark.py
+"""
+from __future__ import print_function
+
+import time
+
+import gdata.spreadsheet
+
+from batch_benchmark import COLUMNS, StubClient
+from google_spreadsheet import parser
+from google_spreadsheet.records import Cell
+
+try:
+    from xml.etree import cElementTree as stdlib_etree
+except ImportError:
+    from xml.etree import ElementTree as stdlib_etree
+
+
+def parse_gdata(body):
+    feed = gdata.spreadsheet.SpreadsheetsCellsFeedFromString(body)
+    return [Cell.from_entry(entry) for entry in feed.entry]
+
+
+def parse_streaming(body):
+    return parser.parse_cells(body).entries
+
+
+def parse_stdlib(body):
+    etree, parser.etree = parser.etree, stdlib_etree
+    try:
+        return parser.parse_cells(body).entries
+    finally:
+        parser.etree = etree
+
+
+def timed(parse, body):
+    start = time.time()
+    cells = parse(body)
+    return time.time() - start, len(cells)
+
+
+def main():
+    print('parsing with %s' % parser.etree.__name__)
+    print('%10s %12s %12s %12s' % ('cells', 'gdata (s)', 'parser (s)',
+                                   'stdlib (s)'))
+    for rows in (1000, 5000, 10000):
+        body = StubClient(rows).GetCellsFeed('key').ToString()
+        timings = [timed(parse, body) for parse in
+                   (parse_gdata, parse_streaming, parse_stdlib)]
+        assert len(set(count for _, count in timings)) == 1
+        print('%10d %12.3f %12.3f %12.3f' % (
+            rows * COLUMNS, timings[0][0], timings[1][0], timings[2][0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark Worksheet operations against the fake Spreadsheets service.
+
+Every operation runs on a freshly loaded worksheet of the given size,
+served by google_spreadsheet.testing.FakeSpreadsheetService with a fixed
+latency per request. For each operation the wall time, the number of
+requests and the bytes sent and received are reported, so regressions in
+any of them show up before they reach the real service.
+
+    PYTHONPATH=. python benchmarks/suite.py --rows 1000 --latency 0.05
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from google_spreadsheet.api import Worksheet
+from google_spreadsheet.testing import FakeSpreadsheetService
+
+SPREADSHEET_KEY = 'key'
+WORKSHEET_KEY = 'od6'
+
+
+def get_rows(sheet, rows, cols):
+    sheet.get_rows()
+    sheet.get_rows()
+
+
+def batch(sheet, rows, cols):
+    data = [['v{0}'.format(c) for c in range(cols)] for r in range(rows - 1)]
+    sheet.batch((2, 1), (rows, cols), data)
+
+
+def batch_verify_key_content(sheet, rows, cols):
+    # half of the keys exist, the other half are appended
+    data = [['r{0}c1'.format(r)] + ['v'] * (cols - 1)
+            for r in range(rows // 2, rows + rows // 2)]
+    sheet.batch_verify_key_content(data)
+
+
+def insert_row(sheet, rows, cols):
+    for i in range(10):
+        sheet.insert_row({'col1': 'new{0}'.format(i), 'col2': str(i)})
+
+
+def delete_all_rows(sheet, rows, cols):
+    sheet.delete_all_rows()
+
+
+def delete_all_rows_truncate(sheet, rows, cols):
+    sheet.delete_all_rows(truncate=True)
+
+
+OPERATIONS = [get_rows, batch, batch_verify_key_content, insert_row,
+              delete_all_rows, delete_all_rows_truncate]
+
+
+def run(operation, rows, cols, latency):
+    """Run an operation on a new worksheet.
+
+    :return:
+        The seconds taken, the number of requests and the bytes sent and
+        received, loading the worksheet not included.
+    """
+    service = FakeSpreadsheetService(latency)
+    service.add_worksheet(SPREADSHEET_KEY, WORKSHEET_KEY, rows, cols)
+    sheet = Worksheet(service.client(), SPREADSHEET_KEY, WORKSHEET_KEY)
+    sheet.cells
+    service.reset_counters()
+    start = time.time()
+    operation(sheet, rows, cols)
+    return (time.time() - start, service.requests, service.bytes_sent,
+            service.bytes_received)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000],
+                        help='worksheet sizes in rows, the header included')
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds per request')
+    args = parser.parse_args()
+    print('%-26s %6s %10s %9s %12s %12s' % (
+        'operation', 'rows', 'time (s)', 'requests', 'sent (B)',
+        'received (B)'))
+    for rows in args.rows:
+        for operation in OPERATIONS:
+            seconds, requests, sent, received = run(
+                operation, rows, args.cols, args.latency)
+            print('%-26s %6d %10.3f %9d %12d %12d' % (
+                operation.__name__, rows, seconds, requests, sent, received))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""asyncio counterparts of SpreadsheetAPI and Worksheet.
+
+Requires Python 3 and aiohttp. Requests go through one aiohttp session
+whose connections are reused by every worksheet of an API object. gdata,
+which does not run on Python 3, is not used: feeds are parsed with the
+same code as the blocking API, so both return identical rows, and request
+bodies are written by :mod:`google_spreadsheet.serializer`.
+"""
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import aiohttp
+
+from google_spreadsheet.batch import BatchWriter, DEFAULT_BATCH_SIZE
+from google_spreadsheet.common import (ID_FIELD, CellIndex, RequestError,
+                                       WorksheetException, row_to_dict)
+from google_spreadsheet.parser import (parse_batch, parse_cells, parse_rows,
+                                       parse_titles)
+from google_spreadsheet.serializer import row_entry
+
+FEEDS_URL = 'https://spreadsheets.google.com/feeds'
+DEFAULT_CONNECTIONS = 100
+
+
+def _row_values(row_data):
+    """The values of a row dictionary, without its ID."""
+    return dict((key, value) for key, value in row_data.items()
+                if key != ID_FIELD)
+
+
+def _list_params(query=None, order_by=None, reverse=None):
+    """Make the parameters of a list feed query.
+
+    :return:
+        A dictionary of URL parameters, as
+        :func:`google_spreadsheet.api.make_list_query` would set them.
+    """
+    params = {}
+    if query:
+        params['sq'] = query
+    if order_by:
+        params['orderby'] = order_by
+    if reverse:
+        params['reverse'] = reverse
+    return params
+
+
+class AsyncSpreadsheetAPI(object):
+    def __init__(self, access_token, connections=DEFAULT_CONNECTIONS,
+                 timeout=60, session=None):
+        """Initialise an asyncio Spreadsheet API wrapper.
+
+        :param access_token:
+            An OAuth2 access token.
+        :param connections:
+            The maximum number of open connections.
+        :param timeout:
+            The total timeout of a request in seconds.
+        :param session:
+            An aiohttp.ClientSession to use instead of creating one.
+        """
+        self.access_token = access_token
+        self.connections = connections
+        self.timeout = timeout
+        self.session = session
+
+    @classmethod
+    def from_api(cls, api, **kwargs):
+        """Create an asyncio wrapper using the credentials of a
+        :class:`~google_spreadsheet.api.SpreadsheetAPI`.
+        """
+        return cls(api.credentials.access_token, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def close(self):
+        """Close the session and its connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, method, url, data=None, converter=None):
+        """Make a request.
+
+        :param method:
+            The HTTP method.
+        :param url:
+            The URL to request.
+        :param data:
+            The Atom XML to send, as bytes.
+        :param converter:
+            A function turning the response body into an object.
+        :return:
+            The converted response body.
+        :raises google_spreadsheet.common.RequestError:
+            If the server responds with an error.
+        """
+        headers = {'Authorization': 'Bearer %s' % self.access_token}
+        if data is not None:
+            headers['Content-Type'] = 'application/atom+xml'
+        async with self._get_session().request(method, url, data=data,
+                                               headers=headers) as response:
+            body = await response.read()
+            if response.status >= 300:
+                raise RequestError({'status': response.status,
+                    'reason': response.reason, 'body': body})
+        if converter is not None:
+            return converter(body)
+        return body
+
+    async def list_spreadsheets(self):
+        """List Spreadsheets.
+
+        :return:
+            A list with information about the spreadsheets available
+        """
+        sheets = await self.request('GET',
+            '%s/spreadsheets/private/full' % FEEDS_URL,
+            converter=parse_titles)
+        return sheets.entries
+
+    async def list_worksheets(self, spreadsheet_key):
+        """List Worksheets.
+
+        :return:
+            A list with information about the worksheets available
+        """
+        wks = await self.request('GET',
+            '%s/worksheets/%s/private/full' % (FEEDS_URL, spreadsheet_key),
+            converter=parse_titles)
+        return wks.entries
+
+    async def get_worksheet(self, spreadsheet_key, worksheet_key,
+                            batch_size=DEFAULT_BATCH_SIZE):
+        """Get Worksheet.
+
+        :param spreadsheet_key:
+            A string representing a google spreadsheet key.
+        :param worksheet_key:
+            A string representing a google worksheet key.
+        :return:
+            A loaded :class:`AsyncWorksheet`.
+        """
+        worksheet = AsyncWorksheet(self, spreadsheet_key, worksheet_key,
+                                   batch_size)
+        await worksheet.load()
+        return worksheet
+
+
+class AsyncBatchWriter(BatchWriter):
+    """A :class:`~google_spreadsheet.batch.BatchWriter` sending its chunks
+    through an :class:`AsyncSpreadsheetAPI`.
+    """
+    def __init__(self, api, url, max_operations=DEFAULT_BATCH_SIZE,
+                 callback=None, rollback=None):
+        super(AsyncBatchWriter, self).__init__(None, url, max_operations,
+                                               callback, rollback)
+        self.api = api
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.flush()
+
+    async def add_update(self, cell, previous=None):
+        """Queue a cell update, sending the queue if it is full.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :param previous:
+            The (input value, value) the cell held before its update, given
+            back to it if the update fails.
+        """
+        if self._queue(cell, previous):
+            await self.flush()
+
+    async def flush(self):
+        """Send the queued operations.
+
+        :return:
+            A :class:`~google_spreadsheet.batch.BatchResult` or None if
+            nothing was queued.
+        """
+        updates = self._take()
+        if updates is None:
+            return None
+        try:
+            response = await self.api.request('POST', self.url,
+                data=self._body(updates), converter=parse_batch)
+        except RequestError as e:
+            return self._record(updates, error=e)
+        return self._record(updates, response.entries)
+
+
+class AsyncWorksheet(object):
+    """asyncio Worksheet wrapper class.
+    """
+    def __init__(self, api, spreadsheet_key, worksheet_key,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        """Initialise a worksheet. Call `load` before using the cells.
+
+        :param api:
+            An :class:`AsyncSpreadsheetAPI`.
+        :param spreadsheet_key:
+            A string representing a google spreadsheet key.
+        :param worksheet_key:
+            A string representing a google worksheet key.
+        :param batch_size:
+            The maximum number of cell updates sent in one batch request.
+        """
+        self.api = api
+        self.spreadsheet_key = spreadsheet_key
+        self.worksheet_key = worksheet_key
+        self.batch_size = batch_size
+        self.entries = None
+        self.cell_index = None
+        self.batch_url = None
+        self.header_row = None
+
+    def _feed_url(self, feed):
+        return '%s/%s/%s/%s/private/full' % (FEEDS_URL, feed,
+            self.spreadsheet_key, self.worksheet_key)
+
+    async def load(self):
+        """Load the cells feed and the header row."""
+        cells = await self.api.request('GET', self._feed_url('cells'),
+                                       converter=parse_cells)
+        self.cell_index = CellIndex(cells.entries)
+        self.batch_url = cells.batch_url
+        self.header_row = self.cell_index.header_row()
+
+    def find_cell(self, row=1, col=1):
+        """find the cell with the given row and col"""
+        return self.cell_index.get(row, col)
+
+    def find_cell_by_contents(self, searchfor):
+        """find the cell with the given contents"""
+        return self.cell_index.find_by_contents(searchfor)
+
+    async def load_empty_cells(self, startxy, endxy):
+        """Load the cells of a range including empty ones.
+
+        :param startxy:
+            start row,column - integers
+        :param endxy:
+            end row,column - integers
+        """
+        query = urlencode([('min-row', startxy[0]), ('max-row', endxy[0]),
+                           ('min-col', startxy[1]), ('max-col', endxy[1]),
+                           ('return-empty', 'true')])
+        feed = await self.api.request('GET', '%s?%s' % (
+            self._feed_url('cells'), query), converter=parse_cells)
+        for cell in feed.entries:
+            if self.find_cell(cell.row, cell.col) is None:
+                self.cell_index.add(cell)
+
+    async def batch(self, startxy=(2, 1), endxy=(10, 4), data=[],
+                    batch_size=None, diff=False, raise_on_error=True):
+        """Batch Import a list of lists to a specific location.
+
+        See :meth:`google_spreadsheet.api.Worksheet.batch`.
+        :return:
+            The :class:`AsyncBatchWriter` used, which holds the result of
+            every request.
+        :raises WorksheetException:
+            If some of the updates failed and `raise_on_error` is set.
+        """
+        if self.cell_index.has_missing(startxy, endxy, data):
+            await self.load_empty_cells(startxy, endxy)
+            if self.cell_index.has_missing(startxy, endxy, data):
+                raise WorksheetException("Range {0}:{1} is outside of the "
+                    "worksheet.".format(startxy, endxy))
+
+        writer = AsyncBatchWriter(self.api, self.batch_url,
+            batch_size or self.batch_size, callback=self.cell_index.add,
+            rollback=self.cell_index.restore)
+        for cell, value in self.cell_index.fill_values(startxy, endxy, data):
+            if diff and self.cell_index.unchanged(cell, value):
+                writer.skipped += 1
+                continue
+            previous = self.cell_index.set_value(cell, value)
+            await writer.add_update(cell, previous)
+        await writer.flush()
+        if raise_on_error and not writer.ok:
+            raise WorksheetException("Batch update failed: '{0}'".format(
+                writer.results))
+        return writer
+
+    async def get_rows(self, query=None, order_by=None,
+                       reverse=None, filter_func=None):
+        """Get Rows
+
+        See :meth:`google_spreadsheet.api.Worksheet.get_rows`, every call
+        fetches the list feed.
+        :return:
+            A list of row dictionaries.
+        """
+        url = self._feed_url('list')
+        params = _list_params(query, order_by, reverse)
+        if params:
+            url = '%s?%s' % (url, urlencode(sorted(params.items())))
+        feed = await self.api.request('GET', url, converter=parse_rows)
+        entries = feed.entries
+        self.entries = OrderedDict((entry.row_id, entry)
+                                   for entry in entries)
+        rows = [row_to_dict(entry) for entry in entries]
+        if filter_func:
+            rows = [row for row in rows if filter_func(row)]
+        return rows
+
+    async def _get_row_entry_by_id(self, id):
+        if self.entries and id in self.entries:
+            return self.entries[id]
+        feed = await self.api.request('GET',
+            '%s/%s' % (self._feed_url('list'), id), converter=parse_rows)
+        return feed.entries[0]
+
+    def _get_row_id(self, row, action):
+        try:
+            return row[ID_FIELD]
+        except KeyError:
+            raise WorksheetException("Row does not contain '{0}' field. "
+                "Please {1} by ID.".format(ID_FIELD, action))
+
+    async def update_row(self, row_data):
+        """Update Row (By ID).
+
+        Only the fields supplied will be updated.
+        :param row_data:
+            A dictionary containing row data. The row will be updated according
+            to the value in the ID_FIELD.
+        :return:
+            The updated row.
+        """
+        id = self._get_row_id(row_data, 'update')
+        entry = await self._get_row_entry_by_id(id)
+        new_row = row_to_dict(entry)
+        new_row.update(row_data)
+        entry = (await self.api.request('PUT', entry.edit_link,
+            data=row_entry(_row_values(new_row), entry),
+            converter=parse_rows)).entries[0]
+        if self.entries is not None and id in self.entries:
+            self.entries[id] = entry
+        return row_to_dict(entry)
+
+    async def insert_row(self, row_data):
+        """Insert Row
+
+        :param row_data:
+            A dictionary containing row data.
+        :return:
+            A row dictionary for the inserted row.
+        """
+        entry = (await self.api.request('POST', self._feed_url('list'),
+            data=row_entry(_row_values(row_data)),
+            converter=parse_rows)).entries[0]
+        row = row_to_dict(entry)
+        if self.entries is not None:
+            self.entries[row[ID_FIELD]] = entry
+        return row
+
+    async def delete_row(self, row):
+        """Delete Row (By ID).
+
+        :param row:
+            A row dictionary to delete.
+        """
+        id = self._get_row_id(row, 'delete')
+        entry = await self._get_row_entry_by_id(id)
+        await self.api.request('DELETE', entry.edit_link)
+        if self.entries is not None:
+            self.entries.pop(id, None)
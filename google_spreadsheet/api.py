@@ -13,6 +13,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from itertools import groupby
+from concurrent import futures
+
 import gdata.spreadsheet.service
 import gdata.service
 import httplib2
@@ -20,24 +26,156 @@ from oauth2client.file import Storage
 from oauth2client.client import flow_from_clientsecrets
 from oauth2client import tools
 
-ID_FIELD = '__rowid__'
+from google_spreadsheet.batch import BatchWriter, DEFAULT_BATCH_SIZE
+from google_spreadsheet.cache import (ResultCache, Snapshot, SnapshotCache,
+                                      http_date, query_key)
+from google_spreadsheet.common import (ID_FIELD, CellIndex,
+                                       WorksheetException, row_to_dict)
+from google_spreadsheet.parser import parse_cells, parse_rows
+from google_spreadsheet.query import QueryError, RowIndex
+from google_spreadsheet.ratelimit import (RetryPolicy, ThrottledTransport,
+                                          TokenBucket)
+from google_spreadsheet.records import Cell, Row
+from google_spreadsheet.session import BufferedSession
+from google_spreadsheet.executor import OrderedExecutor, DEFAULT_MAX_WORKERS
+from google_spreadsheet.transport import (PooledTransport, DEFAULT_POOL_SIZE,
+                                          DEFAULT_TIMEOUT)
+
+DEFAULT_PAGE_SIZE = 500
+# the most rows or columns left out within a range of cells to load
+RANGE_GAP = 8
+
+WorksheetResult = namedtuple('WorksheetResult', ['spreadsheet_key',
+                                                 'worksheet_key', 'worksheet',
+                                                 'error'])
 
 
-class WorksheetException(Exception):
-    """Base class for spreadsheet exceptions.
+def make_list_query(query=None, order_by=None, reverse=None):
+    """Make a list feed query.
+
+    :return:
+        A :class:`~gdata.spreadsheet.service.ListQuery` or None.
     """
-    pass
+    if query or order_by or reverse:
+        q = gdata.spreadsheet.service.ListQuery()
+        if query:
+            q.sq = query
+        if order_by:
+            q.orderby = order_by
+        if reverse:
+            q.reverse = reverse
+        return q
+    else:
+        return None
+
+
+def cell_ranges(positions):
+    """Group cell positions into few ranges holding few other cells.
+
+    The positions are covered by a single range if it holds at most twice
+    as many cells. Otherwise every row gets a range per run of columns,
+    split where more than RANGE_GAP columns are left out, and the same runs
+    in rows at most RANGE_GAP apart are joined.
+    :param positions:
+        An iterable of (row, col) tuples.
+    :return:
+        A list of (startxy, endxy) tuples.
+    """
+    positions = sorted(set(positions))
+    if not positions:
+        return []
+    start = (positions[0][0], min(col for row, col in positions))
+    end = (positions[-1][0], max(col for row, col in positions))
+    if (end[0] - start[0] + 1) * (end[1] - start[1] + 1) <= 2 * len(positions):
+        return [(start, end)]
+    ranges = []
+    # the index in ranges of the last range of every run of columns
+    runs = {}
+    for row, cells in groupby(positions, key=lambda position: position[0]):
+        cols = [col for r, col in cells]
+        first = last = cols[0]
+        for col in cols[1:] + [None]:
+            if col is not None and col - last <= RANGE_GAP:
+                last = col
+                continue
+            i = runs.get((first, last))
+            if i is not None and row - ranges[i][1][0] <= RANGE_GAP:
+                ranges[i] = (ranges[i][0], (row, last))
+            else:
+                runs[(first, last)] = len(ranges)
+                ranges.append(((row, first), (row, last)))
+            first = last = col
+    return ranges
+
+
+class MutationExecutor(OrderedExecutor):
+    """Run list feed mutations of a worksheet concurrently.
+
+    Updates and deletes of the same row run in the order they were
+    submitted, and so do inserts. Every method returns a
+    :class:`concurrent.futures.Future` for the result of the matching
+    :class:`Worksheet` method.
+    """
+    INSERT_KEY = object()
+
+    def __init__(self, worksheet, max_workers=DEFAULT_MAX_WORKERS,
+                 max_pending=None):
+        """Initialise a mutation executor.
+
+        :param worksheet:
+            The :class:`Worksheet` to mutate.
+        :param max_workers:
+            The number of requests made concurrently.
+        :param max_pending:
+            The maximum number of operations in flight.
+        """
+        super(MutationExecutor, self).__init__(max_workers, max_pending)
+        self.worksheet = worksheet
+
+    def update_row(self, row_data):
+        return self.submit(row_data.get(ID_FIELD), self.worksheet.update_row,
+                           row_data)
+
+    def insert_row(self, row_data):
+        return self.submit(self.INSERT_KEY, self.worksheet.insert_row,
+                           row_data)
+
+    def delete_row(self, row):
+        return self.submit(row.get(ID_FIELD), self.worksheet.delete_row, row)
 
 
 class SpreadsheetAPI(object):
-    def __init__(self, client_secrets_file='./client_secrets.json', credentials_file='./creds.dat'):
+    def __init__(self, client_secrets_file='./client_secrets.json', credentials_file='./creds.dat',
+                 transport=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 cache_dir=None, requests_per_minute=None, retry=RetryPolicy()):
         """Initialise a Spreadsheet API wrapper.
 
         :param client_secrets_file:
             A file containing xml secrets as defined here...
         :param client_credentials_file:
             A file used to cache credentials.
+        :param transport:
+            The HTTP transport used for every request, shared by all
+            worksheets. Defaults to a
+            :class:`~google_spreadsheet.transport.PooledTransport`.
+        :param pool_size:
+            The number of connections the default transport keeps open.
+        :param timeout:
+            The request timeout of the default transport in seconds.
+        :param cache_dir:
+            A directory to keep snapshots of the cells and list feeds of
+            every worksheet in. Snapshots are revalidated with conditional
+            requests, so an unchanged worksheet loads without downloading
+            its feeds again.
+        :param requests_per_minute:
+            A quota shared by every request of the API object. Requests
+            beyond it wait for their turn rather than fail. Defaults to no
+            limit.
+        :param retry:
+            A :class:`~google_spreadsheet.ratelimit.RetryPolicy` for
+            requests answered with 429 or 5xx, or None to not retry.
         """
+        self.cache = SnapshotCache(cache_dir) if cache_dir else None
         self.credentials_file = credentials_file
         self.client_secrets_file = client_secrets_file
         self.storage = Storage(self.credentials_file)
@@ -53,9 +191,14 @@ class SpreadsheetAPI(object):
         if self.credentials.access_token_expired:
             self.credentials.refresh(httplib2.Http())
 
+        self.transport = transport or PooledTransport(pool_size, timeout)
+        if requests_per_minute or retry is not None:
+            limiter = (TokenBucket(requests_per_minute)
+                       if requests_per_minute else None)
+            self.transport = ThrottledTransport(self.transport, limiter, retry)
         self.client = gdata.spreadsheet.service.SpreadsheetsService(
             additional_headers={'Authorization': 'Bearer %s' %
-            self.credentials.access_token})
+            self.credentials.access_token}, http_client=self.transport)
 
     def _get_client(self):
         """Initialize a `gdata` client.
@@ -86,29 +229,101 @@ class SpreadsheetAPI(object):
         return map(lambda e: (e.title.text, e.id.text.rsplit('/', 1)[1]),
             wks.entry)
 
-    def get_worksheet(self, spreadsheet_key, worksheet_key):
+    def get_worksheet(self, spreadsheet_key, worksheet_key, header_only=False):
         """Get Worksheet.
 
+        No request is made until the worksheet is used.
         :param spreadsheet_key:
             A string representing a google spreadsheet key.
         :param worksheet_key:
             A string representing a google worksheet key.
+        :param header_only:
+            Fetch only the header row, rather than every cell, when the
+            header row is needed before the cells are loaded.
+        """
+        return Worksheet(self._get_client(), spreadsheet_key, worksheet_key,
+                         cache=self.cache, header_only=header_only)
+
+    def _load_worksheet(self, spreadsheet_key, worksheet_key, header_only,
+                        rows):
+        sheet = self.get_worksheet(spreadsheet_key, worksheet_key,
+                                   header_only=header_only)
+        if header_only:
+            sheet.header_row
+        else:
+            sheet.cell_index
+        if rows:
+            sheet.get_rows()
+        return sheet
+
+    def load_worksheets(self, keys, max_workers=DEFAULT_MAX_WORKERS,
+                        header_only=False, rows=False):
+        """Load many worksheets concurrently.
+
+        Worksheets are loaded by a pool of threads making their requests
+        over the shared transport, whose `pool_size` should be at least
+        `max_workers`. Worksheets which have not started loading when the
+        generator is closed are not loaded.
+        :param keys:
+            An iterable of (spreadsheet key, worksheet key) pairs.
+        :param max_workers:
+            The number of worksheets loaded at once.
+        :param header_only:
+            Load only the header row of every worksheet, rather than every
+            cell.
+        :param rows:
+            Also fetch the rows of every worksheet.
+        :return:
+            A generator of :class:`WorksheetResult`, in the order the
+            worksheets finish loading. The worksheet is None and the
+            exception is given as the error if a worksheet failed to load.
         """
-        return Worksheet(self._get_client(), spreadsheet_key, worksheet_key)
+        pool = futures.ThreadPoolExecutor(max_workers)
+        pending = {}
+        try:
+            for spreadsheet_key, worksheet_key in keys:
+                future = pool.submit(self._load_worksheet, spreadsheet_key,
+                                     worksheet_key, header_only, rows)
+                pending[future] = (spreadsheet_key, worksheet_key)
+            for future in futures.as_completed(pending):
+                spreadsheet_key, worksheet_key = pending[future]
+                error = future.exception()
+                worksheet = future.result() if error is None else None
+                yield WorksheetResult(spreadsheet_key, worksheet_key,
+                                      worksheet, error)
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
 
 
 class Worksheet(object):
     """Worksheet wrapper class.
     """
-    def __init__(self, gd_client, spreadsheet_key, worksheet_key):
+    def __init__(self, gd_client, spreadsheet_key, worksheet_key,
+                 batch_size=DEFAULT_BATCH_SIZE, cache=None, header_only=False,
+                 results=None):
         """Initialise a client
 
+        The cells feed and the header row are loaded on first use.
+
         :param gd_client:
             A GDATA client.
         :param spreadsheet_key:
             A string representing a google spreadsheet key.
         :param worksheet_key:
             A string representing a google worksheet key.
+        :param batch_size:
+            The maximum number of cell updates sent in one batch request.
+        :param cache:
+            A :class:`~google_spreadsheet.cache.SnapshotCache` to load the
+            cells and list feeds through.
+        :param header_only:
+            Fetch only the header row, rather than every cell, when the
+            header row is needed before the cells are loaded.
+        :param results:
+            A :class:`~google_spreadsheet.cache.ResultCache` for the
+            results of `get_rows`, defaults to one with the default limits.
         """
         self.gd_client = gd_client
         self.spreadsheet_key = spreadsheet_key
@@ -116,75 +331,446 @@ class Worksheet(object):
         self.keys = {'key': spreadsheet_key, 'wksht_id': worksheet_key}
         self.entries = None
         self.query = None
-        self.cells = self.gd_client.GetCellsFeed(self.spreadsheet_key,
+        self.results = results if results is not None else ResultCache()
+        self._query_key = query_key()
+        self._row_index = None
+        self._entries_by_id = {}
+        self._entry_positions = None
+        self._lock = threading.RLock()
+        self.cache = cache
+        self.batch_size = batch_size
+        self.header_only = header_only
+        self._loaded = False
+        self._cell_index = None
+        self._header_row = None
+        self._windows = []
+        self._batch_url = None
+        self.synced = None
+
+    @property
+    def cells(self):
+        """A list of every cell by row and column, loaded on first use."""
+        index = self.cell_index
+        return [index.cells[key] for key in sorted(index.cells)]
+
+    @property
+    def cell_index(self):
+        """The :class:`CellIndex` of every cell, loaded on first use."""
+        if not self._loaded:
+            self._load_cells()
+        return self._cell_index
+
+    @property
+    def header_row(self):
+        """The header row values, loaded on first use."""
+        if self._header_row is None:
+            if self.header_only and not self._loaded:
+                self._header_row = self._get_header_row()
+            else:
+                self._header_row = self.set_header_row()
+        return self._header_row
+
+    @header_row.setter
+    def header_row(self, value):
+        self._header_row = value
+
+    def _load_cells(self):
+        """Load the cells feed and index it.
+
+        Only compact records of the cells are kept, not the feed.
+        """
+        with self._lock:
+            if not self._loaded:
+                feed = self._get_cells_feed()
+                cells = feed.entries
+                if self._cell_index is None:
+                    self._cell_index = CellIndex(cells)
+                else:
+                    # cells of loaded ranges are refreshed in place
+                    for cell in cells:
+                        self._cell_index.add(cell)
+                self._set_batch_url(feed)
+                self._windows = []
+                self._loaded = True
+                self.synced = feed.updated
+
+    def refresh(self):
+        """Bring the loaded cells up to date with the server.
+
+        Only the cells changed since the last load or refresh are fetched,
+        with an updated-min query, and merged into the cells feed and its
+        index. Cells keep their identity, so references to them stay valid.
+        Rows inserted or deleted through the list feed shift cells without
+        changing them; use a new worksheet after such edits.
+        :return:
+            A list of the changed cells.
+        """
+        with self._lock:
+            if not self._loaded or self.synced is None:
+                self._loaded = False
+                self._load_cells()
+                self._header_row = None
+                self._flush_cache()
+                return self.cells
+            query = gdata.spreadsheet.service.CellQuery()
+            query.updated_min = self.synced
+            # cells cleared since are only returned when empty cells are
+            query.return_empty = 'true'
+            feed = self._fetch_cells(query)
+            changed = []
+            for cell in feed.entries:
+                current = self.find_cell(cell.row, cell.col)
+                if current is None and not cell.value:
+                    continue
+                same = (current is not None and
+                        current.value == cell.value and
+                        current.input_value == cell.input_value)
+                # stored either way, for the current edit link
+                cell = self._store_cell(cell)
+                if not same:
+                    changed.append(cell)
+            if feed.updated is not None:
+                self.synced = feed.updated
+            if changed:
+                if any(cell.row == 1 for cell in changed):
+                    self._header_row = None
+                self._flush_cache()
+            return changed
+
+    def _loaded_index(self):
+        """Get the cell index as loaded so far, without loading anything.
+
+        :return:
+            A :class:`CellIndex` of every cell if the cells feed is loaded,
+            otherwise of the cells in the loaded ranges.
+        """
+        with self._lock:
+            if self._cell_index is None:
+                self._cell_index = CellIndex()
+            return self._cell_index
+
+    def _is_loaded(self, row, col):
+        """Check whether a cell is in the loaded cells, the whole feed or a
+        loaded range, and so has to be kept current.
+        """
+        if self._loaded:
+            return True
+        if self._cell_index is None:
+            return False
+        return (self._cell_index.get(row, col) is not None or
+                self._covered((row, col), (row, col)))
+
+    def _covered(self, startxy, endxy):
+        """Check whether a range is within a loaded range."""
+        for start, end in self._windows:
+            if (start[0] <= startxy[0] and start[1] <= startxy[1] and
+                    end[0] >= endxy[0] and end[1] >= endxy[1]):
+                return True
+        return False
+
+    def _set_batch_url(self, feed):
+        if feed.batch_url is not None:
+            self._batch_url = feed.batch_url
+
+    def _feed_uri(self, feed, query=None):
+        """Get the URI of a feed of this worksheet.
+
+        :param feed:
+            The feed name, 'cells' or 'list'.
+        :param query:
+            A query on the feed or None.
+        """
+        uri = 'https://%s/feeds/%s/%s/%s/private/full' % (
+            self.gd_client.server, feed, self.spreadsheet_key,
             self.worksheet_key)
-        self.batchRequest = gdata.spreadsheet.SpreadsheetsCellsFeed()
-        self.header_row = self.set_header_row()
+        if query is not None:
+            query.feed = uri
+            uri = query.ToUri()
+        return uri
+
+    def _fetch_cells(self, query=None):
+        """Fetch the cells feed.
+
+        :param query:
+            A :class:`~gdata.spreadsheet.service.CellQuery` or None.
+        :return:
+            A :class:`~google_spreadsheet.parser.ParsedFeed` of cells.
+        """
+        return self.gd_client.Get(self._feed_uri('cells', query),
+                                  converter=parse_cells)
+
+    def _fetch_rows(self, query=None):
+        """Fetch the list feed.
+
+        :param query:
+            A :class:`~gdata.spreadsheet.service.ListQuery` or None.
+        :return:
+            A :class:`~google_spreadsheet.parser.ParsedFeed` of rows.
+        """
+        return self.gd_client.Get(self._feed_uri('list', query),
+                                  converter=parse_rows)
+
+    def _get_range(self, startxy, endxy, return_empty=False):
+        """Fetch the cells of a range.
+
+        :return:
+            A :class:`~google_spreadsheet.parser.ParsedFeed` of cells.
+        """
+        query = gdata.spreadsheet.service.CellQuery()
+        query.min_row = str(startxy[0])
+        query.max_row = str(endxy[0])
+        query.min_col = str(startxy[1])
+        query.max_col = str(endxy[1])
+        if return_empty:
+            query.return_empty = 'true'
+        feed = self._fetch_cells(query)
+        self._set_batch_url(feed)
+        return feed
+
+    def load_range(self, startxy, endxy, return_empty=False):
+        """Load the cells of a range only.
+
+        Until the whole cells feed is loaded, cell lookups within a loaded
+        range are answered from it and `batch` loads just its own range.
+        Cells which are already known are refreshed in place.
+        :param startxy:
+            start row,column - integers
+        :param endxy:
+            end row,column - integers
+        :param return_empty:
+            Load empty cells as well, so they can be batched.
+        :return:
+            A list of the loaded cells.
+        """
+        feed = self._get_range(startxy, endxy, return_empty)
+        with self._lock:
+            cells = [self._store_cell(cell) for cell in feed.entries]
+            if not self._loaded:
+                self._windows.append((tuple(startxy), tuple(endxy)))
+        return cells
+
+    def _get_header_row(self):
+        """Fetch the header row alone with a range query.
+
+        :return:
+            A list of values.
+        """
+        query = gdata.spreadsheet.service.CellQuery()
+        query.min_row = '1'
+        query.max_row = '1'
+        feed = self._fetch_cells(query)
+        self._set_batch_url(feed)
+        return CellIndex(feed.entries).header_row()
+
+    def _get_cells_feed(self):
+        """Get the cells feed, through the snapshot cache if there is one.
+        """
+        if self.cache is None:
+            return self._fetch_cells()
+        return self._get_cached_feed('cells', None, parse_cells)
+
+    def _get_list_feed(self, query=None):
+        """Get the list feed, through the snapshot cache if there is one.
+        """
+        if self.cache is None:
+            return self._fetch_rows(query)
+        return self._get_cached_feed('list', query, parse_rows)
+
+    def _get_cached_feed(self, feed, query, converter):
+        """Get a feed, revalidating its cached snapshot.
+
+        The request is conditional on the ETag of the snapshot, or on its
+        updated timestamp if the server sent no ETag. If the feed has not
+        changed the snapshot is used, otherwise it is replaced.
+        :param feed:
+            The feed name, 'cells' or 'list'.
+        :param query:
+            A query on the feed or None.
+        :param converter:
+            A function parsing the feed.
+        :return:
+            The parsed feed.
+        """
+        uri = self._feed_uri(feed, query)
+        snapshot = self.cache.get(self.spreadsheet_key, self.worksheet_key,
+                                  uri)
+        headers = {}
+        if snapshot is not None:
+            if snapshot.etag:
+                headers['If-None-Match'] = snapshot.etag
+            elif snapshot.updated:
+                headers['If-Modified-Since'] = http_date(snapshot.updated)
+        response = self.gd_client.request('GET', uri, headers=headers)
+        body = response.read()
+        if response.status == 304 and snapshot is not None:
+            return converter(snapshot.body)
+        if response.status != 200:
+            raise gdata.service.RequestError({'status': response.status,
+                'reason': response.reason, 'body': body})
+        result = converter(body)
+        self.cache.set(self.spreadsheet_key, self.worksheet_key, uri,
+                       Snapshot(response.getheader('ETag'), result.updated,
+                                body))
+        return result
 
     def find_cell_by_contents(self, searchfor):
         """find the cell with the given contents"""
-        for cell in enumerate(self.cells.entry):
-            if cell[1].content.text == searchfor:
-                return cell[1]
-        return None
+        return self.cell_index.find_by_contents(searchfor)
+
+    def batch_writer(self, batch_size=None):
+        """Get a writer which sends queued cell updates in chunks.
+
+        Cells the server reports as updated are stored back in the cell
+        index, cells whose update failed get their previous values back.
+        :param batch_size:
+            The maximum number of updates per request, defaults to the
+            worksheet batch size.
+        :return:
+            A :class:`~google_spreadsheet.batch.BatchWriter`.
+        """
+        return BatchWriter(self.gd_client, self._get_batch_url(),
+            batch_size or self.batch_size, callback=self._store_cell,
+            rollback=self._restore_cell)
 
-    def batch_verify_key_content(self, data=[]):
+    def _get_batch_url(self):
+        """Get the batch URL of the cells feed.
+
+        It is taken from any cells feed loaded so far, or from the feed of
+        the first cell rather than loading every cell for it.
+        """
+        if self._batch_url is None:
+            self._get_range((1, 1), (1, 1))
+        return self._batch_url
+
+    def _check_writer(self, writer, action):
+        """Raise a WorksheetException if the server did not make some of the
+        updates of a writer.
+
+        :param writer:
+            The :class:`~google_spreadsheet.batch.BatchWriter` used.
+        :param action:
+            What the updates were for, to start the message with.
+        """
+        if writer is not None and not writer.ok:
+            raise WorksheetException("{0} failed: '{1}'".format(
+                action, writer.results))
+
+    def batch_verify_key_content(self, data=[], key_col=1, batch_size=None,
+                                 diff=False, raise_on_error=True):
         """
         import a list of lists of data into a spreadsheet.  Check each row to
-        see if it already exists.  If it does exist based on using the first
-        column as the key, update any other columns that need it.  If it does
+        see if it already exists.  If it does exist based on the contents of
+        the key column, update any other columns that need it.  If it does
         not exist, insert it at the end of the spreadsheet.  This does not
         update cells that are empty.  This is intended to be used when you
         have data that changes and updates are necessary.
 
         :param data:
             list of lists where each inner list is a row
+        :param key_col:
+            The column holding the key of each row - integer, defaults to
+            the first column
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :param diff:
+            Only send the cells of matched rows whose value changes. The
+            number of cells left out is in the `skipped` attribute of the
+            returned writer.
+        :param raise_on_error:
+            Raise if the server did not make some of the updates, rather
+            than only recording it in the returned writer.
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` used, which
+            holds the result of every request.
+        :raises WorksheetException:
+            If some of the updates failed, after every chunk was sent.
         """
+        writer = self.batch_writer(batch_size)
+        new_rows = OrderedDict()
         for row in data:
-            cell = self.find_cell_by_contents(row[0])
-            if cell and cell.cell.col == '1':
-                for col in row:
-                    cell.cell.inputValue = col
-                    self.batchRequest.AddUpdate(cell)
-                    cell = self.next_cell(cell)
+            key = self.cell_index.find_key(row[key_col - 1], key_col)
+            if key is not None:
+                for c, value in enumerate(row):
+                    cell = self.find_cell(key.row, c + 1)
                     if cell is None:
-                        break
+                        continue
+                    if diff and self.cell_index.unchanged(cell, value):
+                        writer.skipped += 1
+                        continue
+                    previous = self.cell_index.set_value(cell, value)
+                    writer.add_update(cell, previous)
             else:
-                self.insert_as_last(row)
-        updated = self.gd_client.ExecuteBatch(self.batchRequest, self.cells.GetBatchLink().href)
+                # a key seen twice in data is inserted once, with the last row
+                new_rows[row[key_col - 1]] = row
+        # new rows are written to the cells feed in the same batch
+        self._append_rows(list(new_rows.values()), writer)
+        writer.flush()
+        self._flush_cache()
+        if raise_on_error:
+            self._check_writer(writer, "Batch update")
+        return writer
 
     def next_cell(self, cell):
         """find the next cell in this row.  Empty cells do not exist to the
         google api for whatever reason.
 
         :param cell:
-            gdata.spreadsheet.SpreadsheetsCell object
+            google_spreadsheet.records.Cell object
             used to get the current row
         :return:
-            gdata.spreadsheet.SpreadsheetsCell object
+            google_spreadsheet.records.Cell object
             None if there is no matching cell
         """
-        col = int(cell.cell.col)
+        col = cell.col
         col = col + 1
-        return self.find_cell(cell.cell.row, col)
+        return self.find_cell(cell.row, col)
 
     def find_cell(self, row=1, col=1):
-        """find the cell with the given row and col"""
-        row = str(row)
-        col = str(col)
-        for cell in enumerate(self.cells.entry):
-            if cell[1].cell.row == row:
-                if cell[1].cell.col == col:
-                    return cell[1]
-        return None
+        """find the cell with the given row and col
+
+        Cells within a loaded range are found without loading every cell.
+        """
+        position = (int(row), int(col))
+        if not self._loaded and self._covered(position, position):
+            return self._cell_index.get(row, col)
+        return self.cell_index.get(row, col)
 
     def update_cell(self, row, col, val):
         # .77 sec / call or about 4675 cells/hour
         # this does create the cell though if it is blank or does not exist
         # which is cool
-        return self.gd_client.UpdateCell(row, col, val, self.spreadsheet_key, self.worksheet_key)
+        cell = self.gd_client.UpdateCell(row, col, val, self.spreadsheet_key, self.worksheet_key)
+        if isinstance(cell, gdata.spreadsheet.SpreadsheetsCell):
+            cell = Cell.from_entry(cell)
+            # cells which are not loaded yet are fetched current when they are
+            with self._lock:
+                if self._is_loaded(cell.row, cell.col):
+                    cell = self._store_cell(cell)
+        self._flush_cache()
+        return cell
+
+    def _store_cell(self, cell):
+        """Store a cell in the cell index.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :return:
+            The stored cell.
+        """
+        return self._loaded_index().add(cell)
+
+    def _restore_cell(self, cell, previous):
+        """Give a cell whose update failed its previous values back.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :param previous:
+            The (input value, value) it held before the update.
+        """
+        self._loaded_index().restore(cell, previous)
 
-    def batch(self, startxy=(2, 1), endxy=(10, 4), data=[]):
+    def batch(self, startxy=(2, 1), endxy=(10, 4), data=[], batch_size=None,
+              diff=False, raise_on_error=True):
         """Batch Import a list of lists to a specific location.
         :param startxy:
             start row,column - integers
@@ -192,47 +778,238 @@ class Worksheet(object):
             end row,column - integers
         :param data:
             The data to batch import - list of lists
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :param diff:
+            Only send the cells whose value changes. The number of cells
+            left out is in the `skipped` attribute of the returned writer.
+        :param raise_on_error:
+            Raise if the server did not make some of the updates, rather
+            than only recording it in the returned writer.
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` used, which
+            holds the result of every request.
+        :raises WorksheetException:
+            If some of the updates failed, after every chunk was sent.
 
         data always starts at startxy
         data outside the given startxy / endxy range is ignored
         insufficient data is set as a blank
         """
 
-        for r in range(startxy[0], endxy[0] + 1):
-            for c in range(startxy[1], endxy[1] + 1):
+        # only the range is loaded if the cells are not loaded yet
+        if not self._loaded and not self._covered(startxy, endxy):
+            self.load_range(startxy, endxy, return_empty=True)
+        index = self._loaded_index()
 
-                # get content from data passed in
-                # is this cell within the data passed in? then grab it
-                content = ''
-                cell = self.find_cell(r, c)
-                try:
-                    content = str(data[r - startxy[0]][c - startxy[1]])
-                except (IndexError):
-                    if cell:
-                        cell.cell.inputValue = ''
-                        self.batchRequest.AddUpdate(cell)
-                        # do not want to update_cell here
-                        # it's already blank, leave it alone
-                    continue
-                if cell:
-                    cell.cell.inputValue = content
-                    self.batchRequest.AddUpdate(cell)
-                else:
-                    self.update_cell(r, c, content)
+        # cells that do not exist yet are fetched empty, in one request,
+        # so they can be written in the same batch as everything else
+        if index.has_missing(startxy, endxy, data):
+            self.load_empty_cells(startxy, endxy)
+            if index.has_missing(startxy, endxy, data):
+                raise WorksheetException("Range {0}:{1} is outside of the "
+                    "worksheet.".format(startxy, endxy))
+
+        writer = self.batch_writer(batch_size)
+        for cell, value in index.fill_values(startxy, endxy, data):
+            if diff and index.unchanged(cell, value):
+                writer.skipped += 1
+                continue
+            previous = index.set_value(cell, value)
+            writer.add_update(cell, previous)
+        writer.flush()
+        if writer.results:
+            # the rows of the list feed may have changed
+            self._flush_cache()
+        if raise_on_error:
+            self._check_writer(writer, "Batch update")
+        return writer
+
+    def write_cells(self, values, batch_size=None, diff=False,
+                    raise_on_error=True):
+        """Write values to cells anywhere in the worksheet.
 
-        updated = self.gd_client.ExecuteBatch(self.batchRequest, self.cells.GetBatchLink().href)
+        Like `batch`, but for cells which do not have to form a range.
+        Cells which are not loaded are loaded with a few range requests,
+        which only hold many other cells if the written ones are close
+        together, see `cell_ranges`.
+        :param values:
+            A dictionary of (row, col) to value.
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :param diff:
+            Leave out cells which already hold their new value.
+        :param raise_on_error:
+            Raise if the server did not make some of the updates, rather
+            than only recording it in the returned writer.
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` used, or None
+            if there was nothing to write.
+        :raises WorksheetException:
+            If some of the updates failed, after every chunk was sent.
+        """
+        if not values:
+            return None
+        if not self._loaded:
+            uncovered = [position for position in values
+                         if not self._covered(position, position)]
+            for startxy, endxy in cell_ranges(uncovered):
+                self.load_range(startxy, endxy, return_empty=True)
+        index = self._loaded_index()
+        missing = [(row, col) for row, col in values
+                   if index.get(row, col) is None]
+        for startxy, endxy in cell_ranges(missing):
+            self.load_empty_cells(startxy, endxy)
+        for row, col in missing:
+            if index.get(row, col) is None:
+                raise WorksheetException("Cell {0} is outside of the "
+                    "worksheet.".format((row, col)))
+
+        writer = self.batch_writer(batch_size)
+        for row, col in sorted(values):
+            cell = index.get(row, col)
+            value = values[(row, col)]
+            if diff and index.unchanged(cell, value):
+                writer.skipped += 1
+                continue
+            previous = index.set_value(cell, value)
+            writer.add_update(cell, previous)
+        writer.flush()
+        if writer.results:
+            self._flush_cache()
+        if raise_on_error:
+            self._check_writer(writer, "Batch update")
+        return writer
+
+    def buffered(self, max_ops=DEFAULT_BATCH_SIZE, max_delay=None,
+                 batch_size=None, diff=False):
+        """Get a session buffering writes to the worksheet.
+
+        :param max_ops:
+            Flush once this many cell writes and inserts are buffered, or
+            None for no limit.
+        :param max_delay:
+            Flush at most this many seconds after the first buffered write,
+            or None to wait for the other triggers.
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :param diff:
+            Leave out cells which already hold their new value.
+        :return:
+            A :class:`~google_spreadsheet.session.BufferedSession`.
+        """
+        return BufferedSession(self, max_ops, max_delay, batch_size, diff)
+
+    def to_frame(self, header=True, coerce=False):
+        """Get the cells as a pandas DataFrame.
+
+        Requires pandas. Values are taken from the cell index directly,
+        without building a dictionary per row.
+        :param header:
+            Use the header row for column names, and only the columns it
+            names. Otherwise every column is included, named by number.
+        :param coerce:
+            Turn columns holding only numbers into numeric columns, those
+            whose numbers would be written back as different text excepted.
+        :return:
+            A :class:`pandas.DataFrame`.
+        """
+        from google_spreadsheet.frame import cells_to_frame
+        first = 2 if header else 1
+        cells = dict(((row - first, col - 1), cell.value)
+                     for (row, col), cell in self.cell_index.cells.items()
+                     if row >= first and cell.value)
+        return cells_to_frame(cells, self.header_row if header else None,
+                              coerce)
+
+    def write_frame(self, frame, start=(1, 1), header=True, batch_size=None,
+                    diff=False):
+        """Write a pandas DataFrame with batched cell updates.
+
+        The worksheet is grown if the frame does not fit.
+        :param frame:
+            A :class:`pandas.DataFrame`.
+        :param start:
+            The row,column of the top left cell - integers
+        :param header:
+            Write the column names as the first row.
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :param diff:
+            Only send the cells whose value changes.
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` used, or None
+            if there was nothing to write.
+        :raises WorksheetException:
+            If some of the updates failed, see `batch`.
+        """
+        from google_spreadsheet.frame import frame_to_rows
+        rows = frame_to_rows(frame, header)
+        if not rows or not len(frame.columns):
+            return None
+        end = (start[0] + len(rows) - 1, start[1] + len(frame.columns) - 1)
+        entry = self._get_worksheet_entry()
+        if (int(entry.row_count.text) < end[0] or
+                int(entry.col_count.text) < end[1]):
+            self.resize(max(end[0], int(entry.row_count.text)),
+                        max(end[1], int(entry.col_count.text)), entry=entry)
+        return self.batch(start, end, rows, batch_size, diff)
+
+    def load_empty_cells(self, startxy, endxy):
+        """Load the cells of a range including empty ones.
+
+        Empty cells are not part of the cells feed unless they are asked for
+        explicitly. Once loaded they can be updated in a batch like any other
+        cell. Cells which are already known are left as they are.
+        :param startxy:
+            start row,column - integers
+        :param endxy:
+            end row,column - integers
+        :return:
+            A list of the cells as the server returned them.
+        """
+        feed = self._get_range(startxy, endxy, return_empty=True)
+        with self._lock:
+            index = self._loaded_index()
+            for cell in feed.entries:
+                if index.get(cell.row, cell.col) is None:
+                    self._store_cell(cell)
+            if not self._loaded:
+                self._windows.append((tuple(startxy), tuple(endxy)))
+        return feed.entries
+
+    def _reload_rows(self, min_row):
+        """Reload the cells from the given row down.
+
+        Rows changed through the list feed are not reflected in the cell
+        index, this brings it up to date with a single request.
+        :param min_row:
+            The first row to reload - integer
+        """
+        index = self.cell_index
+        query = gdata.spreadsheet.service.CellQuery()
+        query.min_row = str(min_row)
+        current = set()
+        for cell in self._fetch_cells(query).entries:
+            current.add(self._store_cell(cell))
+        for (row, col), cell in list(index.cells.items()):
+            if row >= min_row and cell not in current and cell.value:
+                index.set_value(cell, '')
+
+    def _remove_rows(self, min_row):
+        """Forget the cells from the given row down.
+
+        :param min_row:
+            The first row to forget - integer
+        """
+        if self._cell_index is None:
+            return
+        for (row, col), cell in list(self._cell_index.cells.items()):
+            if row >= min_row:
+                self._cell_index.remove(cell)
 
     def set_header_row(self):
-        header = []
-        c = 1
-        while True:
-            cell = self.find_cell(1, c)
-            if cell:
-                header.append(cell.content.text)
-            else:
-                break
-            c = c + 1
-        return header
+        return self.cell_index.header_row()
 
     def insert_as_last(self, data):
         """
@@ -249,6 +1026,191 @@ class Worksheet(object):
             row_to_insert[self.header_row[x]] = data[x]
         return self.insert_row(row_to_insert)
 
+    def _header_columns(self):
+        """Map column names to column numbers.
+
+        Both the header text and the key the list feed uses for it (lower
+        case, without spaces and punctuation) are mapped.
+        :return:
+            A dictionary of column name to column number.
+        """
+        if self._header_row is None and not self._loaded:
+            # the header row alone, rather than every cell
+            self._header_row = self._get_header_row()
+        columns = {}
+        for col, name in enumerate(self.header_row, 1):
+            columns[name] = col
+            columns.setdefault(re.sub(r'[^0-9a-z\-.]', '', name.lower()), col)
+        return columns
+
+    def _row_cells(self, row_data, row_numbers):
+        """Map the values of a row update to the cells they go into.
+
+        :param row_data:
+            A dictionary containing row data and an ID_FIELD.
+        :param row_numbers:
+            A dictionary of row ID to row number, see `_row_numbers`.
+        :return:
+            A dictionary of (row, col) to value.
+        """
+        try:
+            id = row_data[ID_FIELD]
+        except KeyError:
+            raise WorksheetException("Row does not contain '{0}' field. "
+                                "Please update by index.".format(ID_FIELD))
+        try:
+            row = row_numbers[id]
+        except KeyError:
+            raise WorksheetException("Row ID '{0}' not found.".format(id))
+        columns = self._header_columns()
+        cells = {}
+        for key, value in row_data.items():
+            if key == ID_FIELD:
+                continue
+            try:
+                cells[(row, columns[key])] = value
+            except KeyError:
+                raise WorksheetException("Row contains unknown column "
+                                         "'{0}'.".format(key))
+        return cells
+
+    def _append_rows(self, rows, writer, first=None):
+        """Queue rows of values to be written after the last used row.
+
+        The worksheet is grown if needed. Only empty cells are written to,
+        and empty values are not written, the cells they would go into are
+        blank already.
+        :param rows:
+            A list of lists where each inner list is a row
+        :param writer:
+            The :class:`~google_spreadsheet.batch.BatchWriter` to queue the
+            cell updates with.
+        :param first:
+            The row to write the first row to. Defaults to the row after the
+            last used row of the cells, which are loaded for it. The rows
+            below the last loaded one are read again first, as rows may have
+            been added since, through the list feed or by other clients.
+        :return:
+            The row number of the first appended row, or None if there are
+            no rows.
+        """
+        if not rows:
+            return None
+        if first is None:
+            self._reload_rows(self.cell_index.last_row() + 1)
+            first = self.cell_index.last_row() + 1
+        last = first + len(rows) - 1
+        width = max(len(row) for row in rows)
+        entry = self._get_worksheet_entry()
+        if int(entry.row_count.text) < last or int(entry.col_count.text) < width:
+            self.resize(max(last, int(entry.row_count.text)),
+                        max(width, int(entry.col_count.text)), entry=entry)
+        for cell in self.load_empty_cells((first, 1), (last, width)):
+            if cell.value:
+                raise WorksheetException("Cannot append rows over the "
+                    "non-empty cell at row {0}, column {1}.".format(
+                        cell.row, cell.col))
+        index = self._loaded_index()
+        for r, row in enumerate(rows, first):
+            for c, value in enumerate(row, 1):
+                if value is None or value == '':
+                    continue
+                cell = index.get(r, c)
+                previous = index.set_value(cell, value)
+                writer.add_update(cell, previous)
+        return first
+
+    def _count_rows(self):
+        """Count the rows of the list feed on the server.
+
+        Only the first row is fetched, with the total number of rows, if the
+        server reports it.
+        :return:
+            The number of rows - integer
+        """
+        query = gdata.spreadsheet.service.ListQuery()
+        query.max_results = '1'
+        feed = self._fetch_rows(query)
+        if feed.total is not None:
+            return feed.total
+        return len(self._fetch_rows().entries)
+
+    def insert_rows(self, rows, batch_size=None):
+        """Insert Rows
+
+        The rows are written after the last row of the list feed, where
+        `insert_row` puts a row, as cell updates in as few batch requests as
+        possible, instead of one request per row. The end of the list feed
+        is found from its number of rows, without loading the cells. Cells
+        are only written if they are empty, a blank row followed by rows of
+        data which is too short for the new rows raises a
+        WorksheetException.
+        :param rows:
+            An iterable of dictionaries containing row data.
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :return:
+            A list of row dictionaries for the inserted rows.
+        """
+        columns = self._header_columns()
+        values = []
+        for row_data in rows:
+            row = [''] * len(self.header_row)
+            for key, value in row_data.items():
+                if key == ID_FIELD:
+                    continue
+                try:
+                    row[columns[key] - 1] = value
+                except KeyError:
+                    raise WorksheetException("Row contains unknown column "
+                                             "'{0}'.".format(key))
+            values.append(row)
+        if not values:
+            return []
+        # the list feed has no entry for the header row
+        first = self._count_rows() + 2
+        writer = self.batch_writer(batch_size)
+        self._append_rows(values, writer, first)
+        writer.flush()
+        self._check_writer(writer, "Row insert")
+        query = gdata.spreadsheet.service.ListQuery()
+        query.start_index = str(first - 1)
+        query.max_results = str(len(values))
+        entries = self._fetch_rows(query).entries
+        with self._lock:
+            self._cache_append(entries)
+        return [self._row_to_dict(entry) for entry in entries]
+
+    def _get_worksheet_entry(self):
+        """Get the worksheet entry of this worksheet.
+
+        :return:
+            A gdata.spreadsheet.SpreadsheetsWorksheet.
+        """
+        return self.gd_client.GetWorksheetsFeed(self.spreadsheet_key,
+            wksht_id=self.worksheet_key)
+
+    def resize(self, rows=None, cols=None, entry=None):
+        """Resize the worksheet grid.
+
+        Shrinking the grid removes the rows and columns outside of it.
+        :param rows:
+            The new number of rows - integer
+        :param cols:
+            The new number of columns - integer
+        :param entry:
+            The current worksheet entry, fetched if not given.
+        :return:
+            The updated gdata.spreadsheet.SpreadsheetsWorksheet.
+        """
+        if entry is None:
+            entry = self._get_worksheet_entry()
+        if rows is not None:
+            entry.row_count.text = str(rows)
+        if cols is not None:
+            entry.col_count.text = str(cols)
+        return self.gd_client.UpdateWorksheet(entry)
+
     def _row_to_dict(self, row):
         """Turn a row of values into a dictionary.
         :param row:
@@ -256,20 +1218,26 @@ class Worksheet(object):
         :return:
             A dictionary with rows.
         """
-        result = dict([(key, row.custom[key].text) for key in row.custom])
-        result[ID_FIELD] = row.id.text.split('/')[-1]
-        return result
+        return row_to_dict(row)
 
-    def _get_row_entries(self, query=None):
+    def _get_row_entries(self):
         """Get Row Entries.
 
+        The entries of the current query are fetched unless the result
+        cache holds them. They are pinned in the cache, so that they are
+        not evicted while in use however large they are.
         :return:
-            A rows entry.
+            A list of :class:`~google_spreadsheet.records.Row`.
         """
-        if not self.entries:
-            self.entries = self.gd_client.GetListFeed(
-                query=query, **self.keys).entry
-        return self.entries
+        with self._lock:
+            self.results.pin(self._query_key)
+            entries = self.results.get(self._query_key)
+            if entries is None:
+                entries = self._get_list_feed(self.query).entries
+                self.results.set(self._query_key, entries)
+            if entries is not self.entries:
+                self._set_entries(entries)
+            return self.entries
 
     def _get_row_entry_by_id(self, id):
         """Get Row Entry by ID
@@ -280,17 +1248,110 @@ class Worksheet(object):
         :return:
             A row entry.
         """
-        entry = [entry for entry in self._get_row_entries()
-                 if entry.id.text.split('/')[-1] == id]
-        if not entry:
-            entry = self.gd_client.GetListFeed(row_id=id, **self.keys).entry
-            if not entry:
-                raise WorksheetException("Row ID '{0}' not found.").format(id)
-        return entry[0]
+        with self._lock:
+            self._get_row_entries()
+            entry = self._entries_by_id.get(id)
+        if entry is None:
+            entries = self.gd_client.Get(
+                '%s/%s' % (self._feed_uri('list'), id),
+                converter=parse_rows).entries
+            if not entries:
+                raise WorksheetException("Row ID '{0}' not found.".format(id))
+            entry = entries[0]
+        return entry
 
     def _flush_cache(self):
-        """Flush Entries Cache."""
-        self.entries = None
+        """Flush Entries Cache and every cached result."""
+        with self._lock:
+            self._set_entries(None)
+            self.results.clear()
+            self._row_index = None
+
+    def _set_entries(self, entries):
+        """Set the entries cache and index it by row ID.
+
+        :param entries:
+            A list of row entries or None.
+        """
+        self.entries = entries
+        self._entries_by_id = dict((entry.row_id, entry)
+                                   for entry in entries or [])
+        self._entry_positions = None
+
+    def _entry_position(self, row_id):
+        """Get the position of a cached entry by row ID.
+
+        Positions are recomputed, without splitting IDs again, only after
+        an entry was removed.
+        :return:
+            An index into the entries cache or None.
+        """
+        if self._entry_positions is None:
+            ids = dict((id(entry), key)
+                       for key, entry in self._entries_by_id.items())
+            self._entry_positions = dict(
+                (ids[id(entry)], i) for i, entry in enumerate(self.entries or []))
+        return self._entry_positions.get(row_id)
+
+    def _kept_results(self):
+        """Drop the cached results of queries, which a changed row may
+        join, leave or move in, except the result in use. That one is kept
+        and patched in place, like the whole list feed, so that indexes
+        into it stay valid.
+
+        :return:
+            A list of the cached results kept.
+        """
+        plain = query_key()
+        kept = []
+        for key, entries in self.results.items():
+            if key == plain or key == self._query_key:
+                kept.append(entries)
+            else:
+                self.results.discard(key)
+        self._row_index = None
+        return kept
+
+    def _cache_append(self, entries):
+        """Append new entries to the cached results kept."""
+        for cached in self._kept_results():
+            for entry in entries:
+                if cached is self.entries:
+                    row_id = entry.row_id
+                    if self._entry_positions is not None:
+                        self._entry_positions[row_id] = len(self.entries)
+                    self._entries_by_id[row_id] = entry
+                cached.append(entry)
+
+    def _cache_replace(self, entry):
+        """Replace the entry with the same row ID as an updated entry in the
+        cached results kept.
+        """
+        row_id = entry.row_id
+        for cached in self._kept_results():
+            if cached is self.entries:
+                if row_id in self._entries_by_id:
+                    self.entries[self._entry_position(row_id)] = entry
+                    self._entries_by_id[row_id] = entry
+                continue
+            for i, other in enumerate(cached):
+                if other.row_id == row_id:
+                    cached[i] = entry
+                    break
+
+    def _cache_remove(self, entry):
+        """Remove an entry by its row ID from every cached result."""
+        row_id = entry.row_id
+        self._row_index = None
+        for key, cached in self.results.items():
+            if cached is self.entries:
+                removed = self._entries_by_id.pop(row_id, None)
+                if removed is not None:
+                    self.entries.remove(removed)
+                    self._entry_positions = None
+            else:
+                cached[:] = [other for other in cached
+                             if other.row_id != row_id]
 
     def _make_query(self, query=None, order_by=None, reverse=None):
         """Make Query.
@@ -300,20 +1361,48 @@ class Worksheet(object):
         :return:
             A :class:`~,gdata.spreadsheet.service.ListQuery` or None.
         """
-        if query or order_by or reverse:
-            q = gdata.spreadsheet.service.ListQuery()
-            if query:
-                q.sq = query
-            if order_by:
-                q.orderby = order_by
-            if reverse:
-                q.reverse = reverse
-            return q
-        else:
-            return None
+        return make_list_query(query, order_by, reverse)
+
+    def _unqueried_rows(self):
+        """Get the entries of the whole list feed, from the result cache
+        if it holds them.
+        """
+        plain = query_key()
+        with self._lock:
+            entries = self.results.get(plain)
+            if entries is None:
+                entries = self._get_list_feed().entries
+                self.results.set(plain, entries)
+        return entries
+
+    def _row_numbers(self):
+        """Map the row IDs of the list feed to worksheet row numbers.
+
+        :return:
+            A dictionary of row ID to row number.
+        """
+        # the list feed starts after the header row
+        return dict((entry.row_id, i)
+                    for i, entry in enumerate(self._unqueried_rows(), 2))
+
+    def _select_locally(self, query=None, order_by=None, reverse=None):
+        """Evaluate a query against the whole list feed in memory.
+
+        The list feed is fetched unless it is cached, and indexed by
+        column as columns are queried and sorted on.
+        :return:
+            A list of :class:`~google_spreadsheet.records.Row`.
+        """
+        entries = self._unqueried_rows()
+        if self._row_index is None or self._row_index.rows is not entries:
+            self._row_index = RowIndex(entries)
+        try:
+            return self._row_index.select(query, order_by, reverse)
+        except QueryError as e:
+            raise WorksheetException(str(e))
 
     def get_rows(self, query=None, order_by=None,
-                 reverse=None, filter_func=None):
+                 reverse=None, filter_func=None, local=False):
         """Get Rows
 
         :param query:
@@ -341,19 +1430,57 @@ class Worksheet(object):
             A lambda function which applied to each row, Gets a row dict as
             argument and returns True or False. Used for filtering rows in
             memory (as opposed to query which filters on the service side).
+        :param local:
+            Evaluate the query and sort in memory, against the whole list
+            feed fetched once and cached, rather than on the service side.
         :return:
             A list of row dictionaries.
         """
-        new_query = self._make_query(query, order_by, reverse)
-        if self.query is not None and self.query != new_query:
-            self._flush_cache()
-        self.query = new_query
-        rows = [self._row_to_dict(row)
-            for row in self._get_row_entries(query=self.query)]
+        key = query_key(query, order_by, reverse)
+        with self._lock:
+            if key != self._query_key:
+                self._set_entries(None)
+                self._query_key = key
+                self.query = self._make_query(query, order_by, reverse)
+                self.results.pin(key)
+            if (local and key != query_key() and
+                    self.results.get(key) is None):
+                self.results.set(key, self._select_locally(query, order_by,
+                                                           reverse))
+            entries = self._get_row_entries()
+        rows = [self._row_to_dict(row) for row in entries]
         if filter_func:
             rows = filter(filter_func, rows)
         return rows
 
+    def iter_rows(self, query=None, order_by=None, reverse=None,
+                  filter_func=None, page_size=DEFAULT_PAGE_SIZE):
+        """Iterate Rows
+
+        Like `get_rows`, but the list feed is fetched one page at a time
+        and rows are turned into dictionaries as they are consumed, so only
+        a page of rows is held in memory. The entries cache is neither used
+        nor filled.
+        :param page_size:
+            The number of rows fetched per request.
+        :return:
+            A generator of row dictionaries.
+        """
+        start = 1
+        while True:
+            list_query = (make_list_query(query, order_by, reverse) or
+                          gdata.spreadsheet.service.ListQuery())
+            list_query.start_index = str(start)
+            list_query.max_results = str(page_size)
+            entries = self._fetch_rows(list_query).entries
+            for entry in entries:
+                row = self._row_to_dict(entry)
+                if filter_func is None or filter_func(row):
+                    yield row
+            if len(entries) < page_size:
+                return
+            start += len(entries)
+
     def update_row(self, row_data):
         """Update Row (By ID).
 
@@ -372,12 +1499,12 @@ class Worksheet(object):
         entry = self._get_row_entry_by_id(id)
         new_row = self._row_to_dict(entry)
         new_row.update(row_data)
-        entry = self.gd_client.UpdateRow(entry, new_row)
+        entry = self.gd_client.UpdateRow(entry.to_entry(), new_row)
         if not isinstance(entry, gdata.spreadsheet.SpreadsheetsList):
             raise WorksheetException("Row update failed: '{0}'".format(entry))
-        for i, e in enumerate(self.entries):
-            if e.id.text == entry.id.text:
-                self.entries[i] = entry
+        entry = Row.from_entry(entry)
+        with self._lock:
+            self._cache_replace(entry)
         return self._row_to_dict(entry)
 
     def update_row_by_index(self, index, row_data):
@@ -392,13 +1519,15 @@ class Worksheet(object):
         :return:
             The updated row.
         """
-        entry = self._get_row_entries(self.query)[index]
+        entry = self._get_row_entries()[index]
         row = self._row_to_dict(entry)
         row.update(row_data)
-        entry = self.gd_client.UpdateRow(entry, row)
+        entry = self.gd_client.UpdateRow(entry.to_entry(), row)
         if not isinstance(entry, gdata.spreadsheet.SpreadsheetsList):
             raise WorksheetException("Row update failed: '{0}'".format(entry))
-        self.entries[index] = entry
+        entry = Row.from_entry(entry)
+        with self._lock:
+            self._cache_replace(entry)
         return self._row_to_dict(entry)
 
     def insert_row(self, row_data):
@@ -412,8 +1541,9 @@ class Worksheet(object):
         entry = self.gd_client.InsertRow(row_data, **self.keys)
         if not isinstance(entry, gdata.spreadsheet.SpreadsheetsList):
             raise WorksheetException("Row insert failed: '{0}'".format(entry))
-        if self.entries:
-            self.entries.append(entry)
+        entry = Row.from_entry(entry)
+        with self._lock:
+            self._cache_append([entry])
         return self._row_to_dict(entry)
 
     def delete_row(self, row):
@@ -429,10 +1559,22 @@ class Worksheet(object):
             raise WorksheetException("Row does not contain '{0}' field. "
                                 "Please delete by index.".format(ID_FIELD))
         entry = self._get_row_entry_by_id(id)
-        self.gd_client.DeleteRow(entry)
-        for i, e in enumerate(self.entries):
-            if e.id.text == entry.id.text:
-                del self.entries[i]
+        self.gd_client.DeleteRow(entry.to_entry())
+        with self._lock:
+            self._cache_remove(entry)
+
+    def executor(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=None):
+        """Get an executor running row mutations concurrently.
+
+        :param max_workers:
+            The number of requests made concurrently.
+        :param max_pending:
+            The maximum number of operations in flight, further operations
+            block until one completes.
+        :return:
+            A :class:`MutationExecutor`.
+        """
+        return MutationExecutor(self, max_workers, max_pending)
 
     def delete_row_by_index(self, index):
         """Delete Row By Index
@@ -441,14 +1583,120 @@ class Worksheet(object):
             A row index. Index is relative to the returned result set, not to
             the original spreadsheet.
         """
-        entry = self._get_row_entries(self.query)[index]
-        self.gd_client.DeleteRow(entry)
-        del self.entries[index]
+        entry = self._get_row_entries()[index]
+        self.gd_client.DeleteRow(entry.to_entry())
+        with self._lock:
+            self._cache_remove(entry)
+
+    def _sheet_rows(self, rows):
+        """Get the worksheet row numbers of rows.
+
+        :param rows:
+            An iterable of row dictionaries and/or row indexes relative to
+            the returned result set.
+        :return:
+            A dictionary of row number - integer, to list entry.
+        """
+        entries = []
+        for row in rows:
+            if isinstance(row, dict):
+                try:
+                    id = row[ID_FIELD]
+                except KeyError:
+                    raise WorksheetException("Row does not contain '{0}' "
+                        "field. Please delete by index.".format(ID_FIELD))
+                entries.append(self._get_row_entry_by_id(id))
+            else:
+                entries.append(self._get_row_entries()[row])
+        if not entries:
+            return {}
+        if self.query is None:
+            all_entries = self._get_row_entries()
+        else:
+            with self._lock:
+                all_entries = self.results.get(query_key())
+            if all_entries is None:
+                all_entries = self._fetch_rows().entries
+        positions = dict((entry.id, i)
+                         for i, entry in enumerate(all_entries))
+        # the list feed starts after the header row
+        return dict((positions[entry.id] + 2, entry) for entry in entries)
+
+    def delete_rows(self, rows, batch_size=None):
+        """Delete Rows
+
+        Deleted rows which run to the last used row are blanked with batched
+        cell updates, so the number of requests for them does not depend on
+        the number of rows. Any other row is deleted with a request of its
+        own, like `delete_row`, so that the rows below it move up with their
+        row IDs. Blanking is only done at the end of the worksheet, since
+        blanking a row with rows below it would break the list feed at it.
+        :param rows:
+            An iterable of row dictionaries, which must contain an ID_FIELD,
+            and/or row indexes relative to the returned result set.
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` used, or None
+            if there was nothing to delete.
+        :raises WorksheetException:
+            If blanking the rows at the end failed, before any other row is
+            deleted.
+        """
+        deleted = self._sheet_rows(rows)
+        if not deleted:
+            return None
+        top = min(deleted)
+        self._reload_rows(top)
+        last = self.cell_index.last_row()
+        tail = last + 1
+        while tail - 1 in deleted:
+            tail -= 1
+        width = 0
+        for (row, col), cell in self.cell_index.cells.items():
+            if row >= tail and cell.input_value:
+                width = max(width, col)
+        writer = self.batch_writer(batch_size)
+        if width:
+            for cell in self.load_empty_cells((tail, 1), (last, width)):
+                cell = self.find_cell(cell.row, cell.col)
+                if cell.input_value:
+                    previous = self.cell_index.set_value(cell, '')
+                    writer.add_update(cell, previous)
+            writer.flush()
+            self._check_writer(writer, "Row delete")
+        for row, entry in sorted(deleted.items()):
+            if row < tail:
+                self.gd_client.DeleteRow(entry.to_entry())
+        if top < tail:
+            self._reload_rows(top)
+        self._flush_cache()
+        return writer
 
-    def delete_all_rows(self, header_rows=0):
+    def delete_all_rows(self, header_rows=0, truncate=False):
         """Delete All Rows
+
+        :param header_rows:
+            The number of rows to keep at the top.
+        :param truncate:
+            Instead of deleting rows one request at a time, shrink the
+            worksheet to the header rows and grow it back, which removes
+            everything below them in two requests. The current query is
+            not taken into account.
         """
-        entries = self._get_row_entries(self.query)
+        if truncate:
+            if self.query is not None:
+                raise WorksheetException("Cannot truncate a queried result "
+                                         "set.")
+            entry = self._get_worksheet_entry()
+            row_count = int(entry.row_count.text)
+            # the header row plus the rows to keep
+            entry = self.resize(header_rows + 1, entry=entry)
+            self.resize(row_count, entry=entry)
+            self._remove_rows(header_rows + 2)
+            self._flush_cache()
+            return
+        entries = self._get_row_entries()
         if header_rows:
             stuff_to_delete = range(header_rows, len(entries))
             stuff_to_delete.reverse()
@@ -456,5 +1704,5 @@ class Worksheet(object):
                 self.delete_row_by_index(x)
         else:
             for entry in entries:
-                self.gd_client.DeleteRow(entry)
+                self.gd_client.DeleteRow(entry.to_entry())
         self._flush_cache()
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from google_spreadsheet.common import RequestError
+from google_spreadsheet.parser import parse_batch
+from google_spreadsheet.serializer import batch_feed
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class BatchResult(object):
+    """The outcome of a single batch request.
+    """
+    def __init__(self, operations, failures=None, error=None):
+        """Initialise a batch result.
+
+        :param operations:
+            The number of operations sent in the request.
+        :param failures:
+            A list of (batch id, status code, reason) tuples for the
+            operations the server rejected.
+        :param error:
+            The :class:`~google_spreadsheet.common.RequestError` of the
+            request if it failed as a whole.
+        """
+        self.operations = operations
+        self.failures = failures or []
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and not self.failures
+
+    def __repr__(self):
+        return '<BatchResult operations={0} failures={1} error={2!r}>'.format(
+            self.operations, len(self.failures), self.error)
+
+
+class BatchWriter(object):
+    """Queue cell updates and send them in chunks.
+
+    Updates are sent as soon as `max_operations` of them are queued, and the
+    queue is cleared after every send, so memory use does not grow with the
+    number of updates. The outcome of every chunk is recorded in
+    `results`, the number of updates left out because they would not change
+    anything in `skipped`. Cells whose update fails, in a rejected entry or
+    a failed request, are given back the values they held before it.
+    """
+    def __init__(self, gd_client, url, max_operations=DEFAULT_BATCH_SIZE,
+                 callback=None, rollback=None):
+        """Initialise a batch writer.
+
+        :param gd_client:
+            A GDATA client.
+        :param url:
+            The batch URL of the cells feed.
+        :param max_operations:
+            The maximum number of operations sent in one request.
+        :param callback:
+            A function called with a :class:`~google_spreadsheet.records.Cell`
+            for every cell the server reports as successfully updated.
+        :param rollback:
+            A function called with a cell and the (input value, value) it
+            held before its update, for every update the server did not
+            make.
+        """
+        if max_operations < 1:
+            raise ValueError("max_operations must be at least 1")
+        self.gd_client = gd_client
+        self.url = url
+        self.max_operations = max_operations
+        self.callback = callback
+        self.rollback = rollback
+        self.results = []
+        self.skipped = 0
+        self.queue = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def __len__(self):
+        """The number of queued operations which have not been sent yet."""
+        return len(self.queue)
+
+    @property
+    def ok(self):
+        """True if every chunk sent so far succeeded."""
+        return all(result.ok for result in self.results)
+
+    @property
+    def sent(self):
+        """The number of operations sent so far."""
+        return sum(result.operations for result in self.results)
+
+    def add_update(self, cell, previous=None):
+        """Queue a cell update, sending the queue if it is full.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :param previous:
+            The (input value, value) the cell held before its update, given
+            back to it if the update fails.
+        """
+        if self._queue(cell, previous):
+            self.flush()
+
+    def flush(self):
+        """Send the queued operations.
+
+        :return:
+            A :class:`BatchResult` or None if nothing was queued.
+        """
+        updates = self._take()
+        if updates is None:
+            return None
+        response = self.gd_client.request(
+            'POST', self.url, data=self._body(updates),
+            headers={'Content-Type': 'application/atom+xml'})
+        body = response.read()
+        if response.status != 200:
+            return self._record(updates, error=RequestError({
+                'status': response.status, 'reason': response.reason,
+                'body': body}))
+        return self._record(updates, parse_batch(body).entries)
+
+    def _queue(self, cell, previous=None):
+        """Queue a cell update.
+
+        :return:
+            True if the queue is full.
+        """
+        self.queue.append((cell, previous))
+        return len(self.queue) >= self.max_operations
+
+    def _take(self):
+        """Take the queued updates, leaving an empty queue.
+
+        :return:
+            A list of (cell, previous values) tuples or None if nothing was
+            queued.
+        """
+        if not self.queue:
+            return None
+        updates, self.queue = self.queue, []
+        return updates
+
+    def _body(self, updates):
+        """Write the batch feed of queued updates."""
+        return batch_feed([cell for cell, previous in updates],
+                          self.url.rsplit('/batch', 1)[0])
+
+    def _record(self, updates, entries=None, error=None):
+        """Record the outcome of sending a batch of cell updates.
+
+        :param updates:
+            The (cell, previous values) tuples sent.
+        :param entries:
+            The :class:`~google_spreadsheet.parser.BatchEntry` of the
+            response, if the request succeeded.
+        :param error:
+            The :class:`~google_spreadsheet.common.RequestError` of the
+            request, if it failed.
+        :return:
+            A :class:`BatchResult`.
+        """
+        failures = []
+        failed = list(updates) if error is not None else []
+        for entry in entries or ():
+            if entry.cell is None:
+                failures.append((entry.batch_id, entry.code, entry.reason))
+                failed.append(updates[int(entry.batch_id)])
+            elif self.callback is not None:
+                self.callback(entry.cell)
+        if self.rollback is not None:
+            for cell, previous in failed:
+                if previous is not None:
+                    self.rollback(cell, previous)
+        result = BatchResult(len(updates), failures, error)
+        self.results.append(result)
+        return result
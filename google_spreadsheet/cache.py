@@ -0,0 +1,259 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import calendar
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from collections import namedtuple, OrderedDict
+from email.utils import formatdate
+
+DEFAULT_MAX_RESULTS = 16
+DEFAULT_RESULT_TTL = 300
+DEFAULT_RESULT_BYTES = 64 * 1024 * 1024
+
+Snapshot = namedtuple('Snapshot', ['etag', 'updated', 'body'])
+
+
+def http_date(updated):
+    """Turn a feed updated timestamp into an HTTP date.
+
+    :param updated:
+        An RFC 3339 timestamp such as '2012-05-01T10:31:02.123Z'.
+    :return:
+        An RFC 1123 date for an If-Modified-Since header.
+    """
+    parsed = time.strptime(updated[:19], '%Y-%m-%dT%H:%M:%S')
+    return formatdate(calendar.timegm(parsed), usegmt=True)
+
+
+def _text(value):
+    """Turn a string read from JSON into a native string."""
+    return None if value is None else str(value)
+
+
+class SnapshotCache(object):
+    """An on-disk cache of feed snapshots.
+
+    A snapshot is the raw feed body with the ETag and updated timestamp it
+    was served with. It is stored as a JSON header line holding the ETag
+    and timestamp, followed by the zlib compressed body, so reading one
+    back never runs code. Snapshots are stored per spreadsheet and
+    worksheet key, one file per feed URL.
+    """
+    def __init__(self, directory):
+        """Initialise a snapshot cache.
+
+        :param directory:
+            The directory to store snapshots in, created if needed.
+        """
+        self.directory = directory
+
+    def _path(self, spreadsheet_key, worksheet_key, url=None):
+        path = os.path.join(self.directory, spreadsheet_key, worksheet_key)
+        if url is not None:
+            path = os.path.join(path, hashlib.sha1(
+                str(url).encode('utf-8')).hexdigest())
+        return path
+
+    def get(self, spreadsheet_key, worksheet_key, url):
+        """Get the snapshot of a feed.
+
+        :return:
+            A :class:`Snapshot` or None if there is none or it is unreadable.
+        """
+        try:
+            with open(self._path(spreadsheet_key, worksheet_key, url),
+                      'rb') as f:
+                header, _, body = f.read().partition(b'\n')
+            header = json.loads(header.decode('utf-8'))
+            return Snapshot(_text(header['etag']), _text(header['updated']),
+                            zlib.decompress(body))
+        except (IOError, OSError, ValueError, TypeError, KeyError,
+                zlib.error):
+            return None
+
+    def set(self, spreadsheet_key, worksheet_key, url, snapshot):
+        """Store the snapshot of a feed.
+
+        The file is replaced atomically, so readers never see half a
+        snapshot.
+        """
+        directory = self._path(spreadsheet_key, worksheet_key)
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        header = json.dumps({'etag': snapshot.etag,
+                             'updated': snapshot.updated})
+        data = header.encode('utf-8') + b'\n' + zlib.compress(snapshot.body)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(tmp, self._path(spreadsheet_key, worksheet_key, url))
+        except Exception:
+            os.remove(tmp)
+            raise
+
+    def invalidate(self, spreadsheet_key, worksheet_key):
+        """Remove every snapshot of a worksheet."""
+        shutil.rmtree(self._path(spreadsheet_key, worksheet_key), True)
+
+
+def query_key(query=None, order_by=None, reverse=None):
+    """Normalise the arguments of a list feed query into a cache key.
+
+    Whitespace outside quoted values is collapsed, and defaults, such as
+    ordering by position or not reversing, are the same as no argument.
+    :return:
+        A hashable key.
+    """
+    if query:
+        parts = re.split(r'("[^"]*")', query.strip())
+        parts[::2] = [re.sub(r'\s+', ' ', part) for part in parts[::2]]
+        query = ''.join(parts)
+    if order_by == 'position':
+        order_by = None
+    return (query or None, order_by or None,
+            str(reverse).lower() == 'true')
+
+
+def result_size(rows):
+    """Estimate the memory held by a list of
+    :class:`~google_spreadsheet.records.Row` in bytes.
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += (sys.getsizeof(row) + sys.getsizeof(row.id) +
+                 sys.getsizeof(row.edit_link) + sys.getsizeof(row.values))
+        for key, value in row.values.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class ResultCache(object):
+    """An in-memory cache of list feed results by query.
+
+    The least recently used results are evicted beyond a number of results
+    or an estimated memory budget, and results expire after a while. The
+    pinned result, the one a worksheet is using, is neither evicted nor
+    counted against the limits, however large it is. The cache is not
+    thread safe, worksheets use it under their lock.
+    """
+    def __init__(self, max_results=DEFAULT_MAX_RESULTS, ttl=DEFAULT_RESULT_TTL,
+                 max_bytes=DEFAULT_RESULT_BYTES, clock=time.time):
+        """Initialise a result cache.
+
+        :param max_results:
+            The number of results kept.
+        :param ttl:
+            The number of seconds a result is used for, or None to keep
+            results until they are evicted.
+        :param max_bytes:
+            The estimated memory the results may hold. A result larger than
+            that on its own is not kept, unless it is pinned.
+        :param clock:
+            A function returning the time in seconds.
+        """
+        self.max_results = max_results
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = 0
+        self.pinned = None
+        self._results = OrderedDict()
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, key):
+        """Get a result, making it the most recently used.
+
+        :return:
+            A list of rows, or None if there is none or it expired.
+        """
+        item = self._results.pop(key, None)
+        if item is None:
+            return None
+        expires, size, rows = item
+        if expires is not None and expires <= self.clock():
+            self.size -= size
+            return None
+        self._results[key] = item
+        return rows
+
+    def set(self, key, rows):
+        """Store a result, evicting the least recently used ones as needed.
+
+        The list is kept as is, changes to it change the cached result.
+        """
+        self.discard(key)
+        size = result_size(rows)
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self._results[key] = (expires, size, rows)
+        self.size += size
+        self._evict()
+
+    def pin(self, key):
+        """Keep a result from being evicted, in place of the one pinned
+        before. It still expires.
+        """
+        if key != self.pinned:
+            self.pinned = key
+            self._evict()
+
+    def _evict(self):
+        """Evict the least recently used results beyond the limits."""
+        count, size = len(self._results), self.size
+        pinned = self._results.get(self.pinned)
+        if pinned is not None:
+            count, size = count - 1, size - pinned[1]
+        for key in list(self._results):
+            if count <= self.max_results and size <= self.max_bytes:
+                break
+            if key == self.pinned:
+                continue
+            size -= self._results[key][1]
+            count -= 1
+            self.discard(key)
+
+    def items(self):
+        """List the results which have not expired, as (key, rows) pairs,
+        without changing how recently they were used.
+        """
+        now = self.clock()
+        return [(key, rows) for key, (expires, size, rows)
+                in self._results.items()
+                if expires is None or expires > now]
+
+    def discard(self, key):
+        """Remove a result if it is cached."""
+        item = self._results.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def clear(self):
+        """Remove every result."""
+        self._results.clear()
+        self.size = 0
@@ -0,0 +1,311 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Exceptions, row helpers and the cell index shared by the blocking and
+the asyncio APIs.
+
+Nothing here imports gdata, which only runs on Python 2, so the asyncio
+API can use it on Python 3.
+"""
+from collections import OrderedDict
+
+ID_FIELD = '__rowid__'
+
+
+class WorksheetException(Exception):
+    """Base class for spreadsheet exceptions.
+    """
+    pass
+
+
+class RequestError(WorksheetException):
+    """A request the server answered with an error status.
+
+    As with gdata.service.RequestError, the first argument is a dictionary
+    of the response 'status', 'reason' and 'body'.
+    """
+    pass
+
+
+def row_to_dict(row):
+    """Turn a list feed row into a dictionary.
+
+    :param row:
+        A :class:`~google_spreadsheet.records.Row`.
+    :return:
+        A dictionary with the row values and the row ID in ID_FIELD.
+    """
+    result = dict(row.values)
+    result[ID_FIELD] = row.row_id
+    return result
+
+
+def _text(value):
+    """Turn a value into the text of a cell."""
+    if value is None:
+        return ''
+    if not isinstance(value, (bytes, type(u''))):
+        return str(value)
+    return value
+
+
+class CellIndex(object):
+    """An index over cells.
+
+    Cells are indexed by integer (row, col), by contents, and for key
+    columns by the contents of that column only.
+    """
+    def __init__(self, entries=()):
+        """Initialise a cell index.
+
+        :param entries:
+            An iterable of :class:`~google_spreadsheet.records.Cell`.
+        """
+        self.cells = {}
+        self.contents = {}
+        self.key_columns = {}
+        for cell in entries:
+            self.add(cell)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def add(self, cell):
+        """Add a cell to the index.
+
+        If a cell is already stored at the same position it is refreshed in
+        place from the given one, so references to it stay valid.
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :return:
+            The stored cell.
+        """
+        key = (cell.row, cell.col)
+        current = self.cells.get(key)
+        if current is None:
+            self.cells[key] = cell
+            self._index_contents(cell)
+            return cell
+        self._unindex_contents(current)
+        current.value = cell.value
+        current.input_value = cell.input_value
+        current.edit_link = cell.edit_link
+        current.id = cell.id
+        self._index_contents(current)
+        return current
+
+    def remove(self, cell):
+        """Remove a cell from the index.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        """
+        key = (cell.row, cell.col)
+        if self.cells.get(key) is cell:
+            self._unindex_contents(cell)
+            del self.cells[key]
+
+    def get(self, row, col):
+        """Get the cell at the given row and col.
+
+        :return:
+            google_spreadsheet.records.Cell object
+            None if there is no matching cell
+        """
+        return self.cells.get((int(row), int(col)))
+
+    def find_by_contents(self, value):
+        """Get the first cell with the given contents.
+
+        :return:
+            google_spreadsheet.records.Cell object
+            None if there is no matching cell
+        """
+        cells = self.contents.get(value)
+        if cells:
+            return cells[next(iter(cells))]
+        return None
+
+    def find_key(self, value, col=1):
+        """Get the first cell in a key column with the given contents.
+
+        The index for a key column is built the first time it is used and
+        kept current from then on.
+
+        :param value:
+            The key to look for.
+        :param col:
+            The key column - integer
+        :return:
+            google_spreadsheet.records.Cell object
+            None if there is no matching cell
+        """
+        col = int(col)
+        if col not in self.key_columns:
+            keys = {}
+            for (row, c), cell in self.cells.items():
+                if c == col:
+                    self._index_key(keys, cell)
+            self.key_columns[col] = keys
+        return self.key_columns[col].get(value)
+
+    def has_missing(self, startxy, endxy, data):
+        """Check whether any cell data is written to by fill does not exist.
+        """
+        for r in range(startxy[0], min(endxy[0], startxy[0] + len(data) - 1) + 1):
+            row = data[r - startxy[0]]
+            for c in range(startxy[1], min(endxy[1], startxy[1] + len(row) - 1) + 1):
+                if self.get(r, c) is None:
+                    return True
+        return False
+
+    def fill(self, startxy, endxy, data):
+        """Set the values of a range of cells from a list of lists.
+
+        data always starts at startxy
+        data outside the given startxy / endxy range is ignored
+        insufficient data is set as a blank
+        :return:
+            A generator of the cells which were set, to be sent in a batch.
+        """
+        for cell, content in self.fill_values(startxy, endxy, data):
+            self.set_value(cell, content)
+            yield cell
+
+    def fill_values(self, startxy, endxy, data):
+        """Get the values `fill` would set, without setting them.
+
+        :return:
+            A generator of (cell, value) tuples.
+        """
+        for r in range(startxy[0], endxy[0] + 1):
+            for c in range(startxy[1], endxy[1] + 1):
+
+                # get content from data passed in
+                # is this cell within the data passed in? then grab it
+                content = ''
+                cell = self.get(r, c)
+                try:
+                    content = str(data[r - startxy[0]][c - startxy[1]])
+                except (IndexError):
+                    if cell:
+                        yield cell, ''
+                        # do not want to update_cell here
+                        # it's already blank, leave it alone
+                    continue
+                yield cell, content
+
+    def unchanged(self, cell, value):
+        """Check whether a cell already holds a value.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :param value:
+            The value to compare its input value to.
+        """
+        return (cell.input_value or '') == _text(value)
+
+    def header_row(self, row=1):
+        """Get the contents of a row up to its first empty cell.
+
+        :param row:
+            The row number - integer
+        :return:
+            A list of values.
+        """
+        header = []
+        c = 1
+        while True:
+            cell = self.get(row, c)
+            if cell is not None and cell.value:
+                header.append(cell.value)
+            else:
+                break
+            c = c + 1
+        return header
+
+    def last_row(self):
+        """Get the last row holding a non-empty cell.
+
+        :return:
+            A row number - integer, 0 if all cells are empty
+        """
+        rows = [row for (row, col), cell in self.cells.items()
+                if cell.value]
+        return max(rows or [0])
+
+    def set_value(self, cell, value):
+        """Set the input value of a cell and re-index its contents.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :param value:
+            The new value.
+        :return:
+            The (input value, value) the cell held before, for `restore`.
+        """
+        previous = (cell.input_value, cell.value)
+        value = _text(value)
+        self._unindex_contents(cell)
+        cell.input_value = value
+        cell.value = value
+        self._index_contents(cell)
+        return previous
+
+    def restore(self, cell, previous):
+        """Give a cell back the values it held before `set_value`, such as
+        after the server rejected its update.
+
+        :param cell:
+            google_spreadsheet.records.Cell object
+        :param previous:
+            The (input value, value) tuple `set_value` returned.
+        """
+        if self.cells.get((cell.row, cell.col)) is not cell:
+            # replaced since, by a cell fetched from the server
+            return
+        self._unindex_contents(cell)
+        cell.input_value, cell.value = previous
+        self._index_contents(cell)
+
+    def _index_key(self, keys, cell):
+        value = cell.value
+        current = keys.get(value)
+        if current is None or cell.row < current.row:
+            keys[value] = cell
+
+    def _index_contents(self, cell):
+        value = cell.value
+        key = (cell.row, cell.col)
+        self.contents.setdefault(value, OrderedDict())[key] = cell
+        keys = self.key_columns.get(cell.col)
+        if keys is not None:
+            self._index_key(keys, cell)
+
+    def _unindex_contents(self, cell):
+        value = cell.value
+        key = (cell.row, cell.col)
+        cells = self.contents.get(value)
+        if cells is None or cells.get(key) is not cell:
+            return
+        del cells[key]
+        if not cells:
+            del self.contents[value]
+        keys = self.key_columns.get(key[1])
+        if keys is not None and keys.get(value) is cell:
+            del keys[value]
+            for (row, col), other in cells.items():
+                if col == key[1]:
+                    self._index_key(keys, other)
@@ -0,0 +1,91 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+
+from concurrent import futures
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class OrderedExecutor(object):
+    """Run calls over a bounded pool of threads.
+
+    Calls submitted with the same key run one after the other in the order
+    they were submitted, calls with different keys run concurrently. At most
+    `max_pending` calls are in flight at any time, `submit` blocks until a
+    slot is free.
+    """
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=None):
+        """Initialise an executor.
+
+        :param max_workers:
+            The number of worker threads.
+        :param max_pending:
+            The maximum number of submitted calls which have not completed
+            yet, defaults to four times the number of workers.
+        """
+        self.pool = futures.ThreadPoolExecutor(max_workers)
+        self.pending = threading.BoundedSemaphore(
+            max_pending or max_workers * 4)
+        self.lock = threading.Lock()
+        self.last = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Submit a call.
+
+        :param key:
+            The ordering key of the call.
+        :param fn:
+            The function to call.
+        :return:
+            A :class:`concurrent.futures.Future` for the result of the call.
+        """
+        self.pending.acquire()
+        try:
+            with self.lock:
+                previous = self.last.get(key)
+                future = self.pool.submit(self._run, previous, fn, args,
+                                          kwargs)
+                self.last[key] = future
+        except Exception:
+            self.pending.release()
+            raise
+        future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    def shutdown(self, wait=True):
+        """Stop accepting calls and optionally wait for the pending ones.
+        """
+        self.pool.shutdown(wait)
+
+    def _run(self, previous, fn, args, kwargs):
+        # the previous call with the same key was submitted, and so picked
+        # up by a worker, before this one: waiting on it cannot deadlock
+        if previous is not None:
+            futures.wait([previous])
+        return fn(*args, **kwargs)
+
+    def _done(self, key, future):
+        with self.lock:
+            if self.last.get(key) is future:
+                del self.last[key]
+        self.pending.release()
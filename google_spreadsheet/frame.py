@@ -0,0 +1,101 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Conversion between cell values and pandas DataFrames.
+
+Requires pandas. Cell values are placed into a grid in one step and
+columns are converted to numbers a whole column at a time.
+"""
+import numpy
+import pandas
+
+
+def cells_to_frame(cells, columns=None, coerce=False):
+    """Turn cell values into a DataFrame.
+
+    :param cells:
+        A dictionary of (row, col) to value, rows and columns numbered
+        from 0.
+    :param columns:
+        The column names, one per column. Columns beyond them are left
+        out. Defaults to the column numbers.
+    :param coerce:
+        Turn columns whose every non-empty value is a number into numeric
+        columns. A column is only turned if every value is the text
+        `frame_to_rows` writes for its number, so columns with leading or
+        trailing zeros, exponents or more digits than a float holds stay
+        text and are written back unchanged.
+    :return:
+        A :class:`pandas.DataFrame` with a row per row up to the last
+        non-empty one. Empty cells are None, or NaN in numeric columns.
+    """
+    if cells:
+        positions = numpy.array(list(cells.keys()), dtype=numpy.intp)
+        values = numpy.empty(len(cells), dtype=object)
+        values[:] = list(cells.values())
+    else:
+        positions = numpy.empty((0, 2), dtype=numpy.intp)
+        values = numpy.empty(0, dtype=object)
+    width = (len(columns) if columns is not None else
+             int(positions[:, 1].max()) + 1 if len(values) else 0)
+    inside = positions[:, 1] < width
+    positions, values = positions[inside], values[inside]
+    height = int(positions[:, 0].max()) + 1 if len(values) else 0
+    grid = numpy.empty((height, width), dtype=object)
+    grid[positions[:, 0], positions[:, 1]] = values
+    frame = pandas.DataFrame(grid, columns=columns)
+    if coerce:
+        for name in frame.columns:
+            column = frame[name]
+            present = column.notna()
+            numbers = pandas.to_numeric(column, errors='coerce')
+            if not present.any() or numbers[present].isna().any():
+                continue
+            texts = numbers[present].map(_cell_text)
+            if (texts == column[present]).all():
+                frame[name] = numbers
+    return frame
+
+
+def _cell_text(value):
+    """Format a number in its shortest form.
+
+    Whole floats, such as those of an integer column with a blank, are
+    written without a decimal point.
+    """
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return value
+
+
+def frame_to_rows(frame, header=True):
+    """Turn a DataFrame into rows of values for a batch.
+
+    :param frame:
+        A :class:`pandas.DataFrame`.
+    :param header:
+        Start with a row of the column names.
+    :return:
+        A list of lists, missing values as empty strings and numbers in
+        their shortest form.
+    """
+    values = frame.astype(object).where(frame.notna(), '')
+    rows = [[_cell_text(value) for value in row]
+            for row in values.values.tolist()]
+    if header:
+        rows.insert(0, [str(name) for name in frame.columns])
+    return rows
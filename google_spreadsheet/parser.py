@@ -0,0 +1,198 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Streaming parsers for the cells and list feeds.
+
+Entries are read one at a time with iterparse and turned straight into
+:class:`~google_spreadsheet.records.Cell` and
+:class:`~google_spreadsheet.records.Row` records, keeping only the fields a
+worksheet uses. Each entry element is discarded as soon as it is read.
+lxml is used if it is installed, the standard library otherwise.
+"""
+from collections import namedtuple
+from io import BytesIO
+
+try:
+    from lxml import etree
+except ImportError:
+    try:
+        from xml.etree import cElementTree as etree
+    except ImportError:
+        from xml.etree import ElementTree as etree
+
+from google_spreadsheet.records import Cell, Row
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+ENTRY = ATOM + 'entry'
+ID = ATOM + 'id'
+LINK = ATOM + 'link'
+CONTENT = ATOM + 'content'
+UPDATED = ATOM + 'updated'
+CELL = '{http://schemas.google.com/spreadsheets/2006}cell'
+CUSTOM = '{http://schemas.google.com/spreadsheets/2006/extended}'
+TITLE = ATOM + 'title'
+BATCH_ID = '{http://schemas.google.com/gdata/batch}id'
+BATCH_STATUS = '{http://schemas.google.com/gdata/batch}status'
+BATCH_REL = 'http://schemas.google.com/g/2005#batch'
+TOTAL_RESULTS = '{http://a9.com/-/spec/opensearch/1.1/}totalResults'
+
+if bytes is str:
+    def _text(value):
+        # Python 2 gdata hands out text encoded, do the same
+        if isinstance(value, type(u'')):
+            return value.encode('utf-8')
+        return value
+else:
+    def _text(value):
+        return value
+
+ParsedFeed = namedtuple('ParsedFeed', ['entries', 'updated', 'batch_url',
+                                       'total'])
+BatchEntry = namedtuple('BatchEntry', ['batch_id', 'code', 'reason', 'cell'])
+
+
+def _parse(body, make_entry):
+    """Parse a feed, or a single entry, one entry at a time.
+
+    :param body:
+        The response body.
+    :param make_entry:
+        A function turning an entry element into a record.
+    :return:
+        A :class:`ParsedFeed`.
+    """
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    if etree.__name__ == 'lxml.etree':
+        # lxml only hands out the entries and can drop them from the tree
+        context = etree.iterparse(BytesIO(body), events=('end',), tag=ENTRY)
+    else:
+        context = etree.iterparse(BytesIO(body), events=('end',))
+    entries = []
+    for event, element in context:
+        if element.tag != ENTRY:
+            continue
+        entries.append(make_entry(element))
+        element.clear()
+        getparent = getattr(element, 'getparent', None)
+        if getparent is not None and getparent() is not None:
+            getparent().remove(element)
+    updated = batch_url = total = None
+    root = context.root
+    if root is not None and root.tag != ENTRY:
+        for child in root:
+            if child.tag == UPDATED:
+                updated = child.text
+            elif child.tag == LINK and child.get('rel') == BATCH_REL:
+                batch_url = child.get('href')
+            elif child.tag == TOTAL_RESULTS:
+                total = int(child.text)
+    return ParsedFeed(entries, updated, batch_url, total)
+
+
+def _make_cell(element):
+    row = col = input_value = text = content = id = edit_link = None
+    for child in element:
+        tag = child.tag
+        if tag == CELL:
+            row = child.get('row')
+            col = child.get('col')
+            input_value = _text(child.get('inputValue'))
+            text = _text(child.text)
+        elif tag == CONTENT:
+            content = _text(child.text)
+        elif tag == ID:
+            id = child.text
+        elif tag == LINK and child.get('rel') == 'edit':
+            edit_link = child.get('href')
+    return Cell(int(row), int(col), content if content is not None else text,
+                input_value, edit_link, id)
+
+
+def _make_row(element):
+    values = {}
+    id = edit_link = None
+    offset = len(CUSTOM)
+    for child in element:
+        tag = child.tag
+        if tag.startswith(CUSTOM):
+            values[tag[offset:]] = _text(child.text)
+        elif tag == ID:
+            id = child.text
+        elif tag == LINK and child.get('rel') == 'edit':
+            edit_link = child.get('href')
+    return Row(id, edit_link, values)
+
+
+def _make_batch_entry(element):
+    batch_id = code = reason = None
+    for child in element:
+        if child.tag == BATCH_ID:
+            batch_id = child.text
+        elif child.tag == BATCH_STATUS:
+            code = child.get('code')
+            reason = child.get('reason')
+    cell = None
+    if code is not None and code.startswith('2'):
+        cell = _make_cell(element)
+    return BatchEntry(batch_id, code, reason, cell)
+
+
+def _make_title(element):
+    title = id = None
+    for child in element:
+        if child.tag == TITLE:
+            title = _text(child.text)
+        elif child.tag == ID:
+            id = child.text
+    return title, id.rsplit('/', 1)[1]
+
+
+def parse_cells(body):
+    """Parse a cells feed.
+
+    :return:
+        A :class:`ParsedFeed` of :class:`~google_spreadsheet.records.Cell`.
+    """
+    return _parse(body, _make_cell)
+
+
+def parse_rows(body):
+    """Parse a list feed, or a single list entry.
+
+    :return:
+        A :class:`ParsedFeed` of :class:`~google_spreadsheet.records.Row`.
+    """
+    return _parse(body, _make_row)
+
+
+def parse_batch(body):
+    """Parse the response to a batch of cell updates.
+
+    :return:
+        A :class:`ParsedFeed` of :class:`BatchEntry`, the cell of an entry
+        being the updated :class:`~google_spreadsheet.records.Cell`, or None
+        if the update failed.
+    """
+    return _parse(body, _make_batch_entry)
+
+
+def parse_titles(body):
+    """Parse a spreadsheets or worksheets feed.
+
+    :return:
+        A :class:`ParsedFeed` of (title, key) tuples.
+    """
+    return _parse(body, _make_title)
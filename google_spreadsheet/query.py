@@ -0,0 +1,289 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Local evaluation of list feed structured queries.
+
+Structured queries such as `name = "Joe" and height < 175` are parsed
+into a tree and evaluated against rows held in memory. A
+:class:`RowIndex` builds, per column and on first use, a hash index for
+equality and sorted indexes for ranges, so a comparison costs a lookup or
+a bisection rather than a scan of every row.
+
+Quoted values are compared as text. Unquoted values which are numbers are
+compared as numbers, against the cells holding numbers; other unquoted
+values are text.
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+
+class QueryError(Exception):
+    """A structured query which cannot be parsed.
+    """
+    pass
+
+
+TOKEN = re.compile(r'\s*(?:(?P<string>"[^"]*")|'
+                   r'(?P<op><>|!=|==|<=|>=|&&|\|\||[=<>()])|'
+                   r'(?P<word>[^\s"=<>!()&|]+))')
+
+OPERATORS = {'==': '=', '!=': '<>', '&&': 'and', '||': 'or'}
+COMPARISONS = frozenset(['=', '<>', '<', '>', '<=', '>='])
+
+
+def _number(value):
+    """Turn a value into a float, or None if it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def tokenize(query):
+    """Split a structured query into tokens.
+
+    :return:
+        A list of (kind, value) pairs, kind being 'op', 'string' or 'word'.
+        Operators are normalised, `and` and `or` words become operators.
+    """
+    tokens = []
+    position = 0
+    query = query.rstrip()
+    while position < len(query):
+        match = TOKEN.match(query, position)
+        if match is None:
+            raise QueryError("Unexpected '{0}' in query.".format(
+                query[position:].strip()))
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = value[1:-1]
+        elif kind == 'op':
+            value = OPERATORS.get(value, value)
+        elif value.lower() in ('and', 'or'):
+            kind, value = 'op', value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+class Comparison(object):
+    """A comparison of a column to a value.
+    """
+    def __init__(self, column, operator, value, quoted):
+        self.column = column
+        self.operator = operator
+        self.value = value
+        self.number = None if quoted else _number(value)
+
+    def __repr__(self):
+        return 'Comparison({0!r}, {1!r}, {2!r})'.format(
+            self.column, self.operator, self.value)
+
+
+class Boolean(object):
+    """An `and` or `or` of two queries.
+    """
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return 'Boolean({0!r}, {1!r}, {2!r})'.format(
+            self.operator, self.left, self.right)
+
+
+class _Parser(object):
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token[0] is None:
+            raise QueryError("Unexpected end of query.")
+        if expected is not None and token[0] != expected:
+            raise QueryError("Unexpected '{0}' in query.".format(token[1]))
+        self.position += 1
+        return token
+
+    def expression(self):
+        node = self.term()
+        while self.peek() == ('op', 'or'):
+            self.take()
+            node = Boolean('or', node, self.term())
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.peek() == ('op', 'and'):
+            self.take()
+            node = Boolean('and', node, self.factor())
+        return node
+
+    def factor(self):
+        if self.peek() == ('op', '('):
+            self.take()
+            node = self.expression()
+            if self.take('op')[1] != ')':
+                raise QueryError("Missing ')' in query.")
+            return node
+        column = self.take('word')[1]
+        operator = self.take('op')[1]
+        if operator not in COMPARISONS:
+            raise QueryError("Unexpected '{0}' in query.".format(operator))
+        kind, value = self.take()
+        if kind == 'op':
+            raise QueryError("Unexpected '{0}' in query.".format(value))
+        return Comparison(column, operator, value, kind == 'string')
+
+
+def parse(query):
+    """Parse a structured query.
+
+    :param query:
+        A query string, columns named as in the list feed.
+    :return:
+        A :class:`Comparison` or :class:`Boolean` tree.
+    """
+    parser = _Parser(tokenize(query))
+    node = parser.expression()
+    if parser.peek()[0] is not None:
+        raise QueryError("Unexpected '{0}' in query.".format(
+            parser.peek()[1]))
+    return node
+
+
+class RowIndex(object):
+    """Indexes over the values of a list of rows.
+
+    Indexes are built for a column the first time it is queried or sorted
+    on. The index does not follow changes to the rows, a new one is needed
+    after them.
+    """
+    def __init__(self, rows):
+        """Initialise a row index.
+
+        :param rows:
+            A list of :class:`~google_spreadsheet.records.Row`.
+        """
+        self.rows = rows
+        self._hashes = {}
+        self._sorted = {}
+
+    def _hash(self, column):
+        """A dictionary of text value to row positions."""
+        index = self._hashes.get(column)
+        if index is None:
+            index = {}
+            for position, row in enumerate(self.rows):
+                index.setdefault(row.values.get(column) or '',
+                                 []).append(position)
+            self._hashes[column] = index
+        return index
+
+    def _sorted_index(self, column, numeric):
+        """Sorted keys, and the row positions in the same order, of the
+        numbers or of the text values of a column.
+        """
+        index = self._sorted.get((column, numeric))
+        if index is None:
+            pairs = []
+            for position, row in enumerate(self.rows):
+                value = row.values.get(column)
+                if numeric:
+                    value = _number(value)
+                    if value is None:
+                        continue
+                else:
+                    value = value or ''
+                pairs.append((value, position))
+            pairs.sort()
+            index = ([key for key, position in pairs],
+                     [position for key, position in pairs])
+            self._sorted[(column, numeric)] = index
+        return index
+
+    def _range(self, node):
+        keys, positions = self._sorted_index(node.column,
+                                             node.number is not None)
+        value = node.number if node.number is not None else node.value
+        start, end = 0, len(keys)
+        if node.operator == '=':
+            start, end = bisect_left(keys, value), bisect_right(keys, value)
+        elif node.operator == '<':
+            end = bisect_left(keys, value)
+        elif node.operator == '<=':
+            end = bisect_right(keys, value)
+        elif node.operator == '>':
+            start = bisect_right(keys, value)
+        elif node.operator == '>=':
+            start = bisect_left(keys, value)
+        return set(positions[start:end])
+
+    def _select(self, node):
+        """The set of positions of the rows matching a query tree."""
+        if isinstance(node, Boolean):
+            left = self._select(node.left)
+            if node.operator == 'and':
+                return left & self._select(node.right) if left else left
+            return left | self._select(node.right)
+        if node.operator == '<>':
+            equal = Comparison(node.column, '=', node.value,
+                               node.number is None)
+            return set(range(len(self.rows))) - self._select(equal)
+        if node.operator == '=' and node.number is None:
+            return set(self._hash(node.column).get(node.value, ()))
+        return self._range(node)
+
+    def select(self, query=None, order_by=None, reverse=None):
+        """Select rows like the list feed does.
+
+        :param query:
+            A structured query string or None for every row.
+        :param order_by:
+            'position' or 'column:name'. Columns holding only numbers are
+            sorted as numbers.
+        :param reverse:
+            'true' to reverse the order.
+        :return:
+            A list of rows.
+        """
+        if query:
+            positions = sorted(self._select(parse(query)))
+        else:
+            positions = list(range(len(self.rows)))
+        if order_by and order_by.startswith('column:'):
+            column = order_by[len('column:'):]
+            keys, ordered = self._sorted_index(column, True)
+            if len(keys) < sum(1 for row in self.rows
+                               if row.values.get(column)):
+                # not every value is a number, sort them as text
+                keys, ordered = self._sorted_index(column, False)
+            rank = dict((position, i) for i, position in enumerate(ordered))
+            # rows without a number come last, in worksheet order
+            positions.sort(key=lambda position: rank.get(position,
+                                                         len(rank)))
+        rows = [self.rows[position] for position in positions]
+        if str(reverse).lower() == 'true':
+            rows.reverse()
+        return rows
@@ -0,0 +1,219 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Rate limiting and retries for a transport.
+
+A :class:`ThrottledTransport` wraps any transport. Every request first
+takes a token from a shared :class:`TokenBucket`, so requests from all
+threads stay within a per-minute quota, and requests answered with 429 or
+5xx are retried by a :class:`RetryPolicy` with jittered exponential
+backoff.
+"""
+import random
+import threading
+import time
+
+import urllib3
+
+from google_spreadsheet.transport import _encode
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 64.0
+
+TOO_MANY_REQUESTS = 429
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+
+
+class TokenBucket(object):
+    """A thread safe token bucket refilled at a per-minute rate.
+    """
+    def __init__(self, per_minute, burst=None, clock=time.time,
+                 sleep=time.sleep):
+        """Initialise a token bucket.
+
+        :param per_minute:
+            The number of tokens added each minute.
+        :param burst:
+            The most tokens the bucket holds, defaults to a second's worth
+            and at least one.
+        :param clock:
+            A function returning the time in seconds.
+        :param sleep:
+            A function sleeping for a number of seconds.
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take a token, waiting until there is one.
+
+        :return:
+            The number of seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill(self.clock())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Take every token for a while, so that no request is made by any
+        thread until `seconds` have passed.
+        """
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RetryPolicy(object):
+    """Decides which failed requests are retried, and when.
+
+    Requests answered with 429 are retried whatever their method, the
+    server has not acted on them. Requests answered with 5xx, or failed
+    with a connection error, are retried only when repeating them is safe:
+    idempotent methods, and batch requests which set cells to given values.
+    """
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        """Initialise a retry policy.
+
+        :param max_retries:
+            The number of times a request is retried.
+        :param base_delay:
+            The delay before the first retry in seconds, doubled for every
+            retry after it.
+        :param max_delay:
+            The longest delay in seconds.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def idempotent(self, operation, url):
+        return (operation.upper() in IDEMPOTENT_METHODS or
+                str(url).split('?')[0].endswith('/batch'))
+
+    def retry_status(self, operation, url, status):
+        """Whether a request answered with `status` is retried."""
+        if status == TOO_MANY_REQUESTS:
+            return True
+        return status >= 500 and self.idempotent(operation, url)
+
+    def retry_error(self, operation, url, error):
+        """Whether a request failed with `error` is retried."""
+        return self.idempotent(operation, url)
+
+    def delay(self, attempt, retry_after=None):
+        """The delay before a retry, with full jitter.
+
+        :param attempt:
+            The number of the retry, from 0.
+        :param retry_after:
+            The value of a Retry-After header, seconds to wait at least.
+        """
+        delay = random.uniform(0, min(self.max_delay,
+                                      self.base_delay * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+
+class ThrottledTransport(object):
+    """A transport limiting and retrying the requests of another.
+    """
+    def __init__(self, transport, limiter=None, retry=None,
+                 sleep=time.sleep):
+        """Initialise a throttled transport.
+
+        :param transport:
+            The transport making the requests.
+        :param limiter:
+            A :class:`TokenBucket` shared by every request, or None to not
+            limit the rate.
+        :param retry:
+            A :class:`RetryPolicy`, or None to not retry.
+        :param sleep:
+            A function sleeping for a number of seconds.
+        """
+        self.transport = transport
+        self.limiter = limiter
+        self.retry = retry
+        self.sleep = sleep
+        self.retries = 0
+
+    def _can_retry(self, attempt):
+        return self.retry is not None and attempt < self.retry.max_retries
+
+    def request(self, operation, url, data=None, headers=None):
+        """Make a request, retrying it as the policy allows.
+
+        :return:
+            The response of the last attempt. Errors of the last attempt
+            are raised.
+        """
+        # file-like data can be read only once
+        data = _encode(data)
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                response = self.transport.request(operation, url, data=data,
+                                                  headers=headers)
+            except (urllib3.exceptions.HTTPError, IOError) as e:
+                if not (self._can_retry(attempt) and
+                        self.retry.retry_error(operation, url, e)):
+                    raise
+                delay = self.retry.delay(attempt)
+            else:
+                if not (self._can_retry(attempt) and
+                        self.retry.retry_status(operation, url,
+                                                response.status)):
+                    return response
+                delay = self.retry.delay(
+                    attempt, response.getheader('Retry-After'))
+                if (response.status == TOO_MANY_REQUESTS and
+                        self.limiter is not None):
+                    # over quota, hold back every thread, not only this one
+                    self.limiter.pause(delay)
+                    delay = 0
+            self.retries += 1
+            attempt += 1
+            if delay:
+                self.sleep(delay)
+
+    def close(self):
+        close = getattr(self.transport, 'close', None)
+        if close is not None:
+            close()
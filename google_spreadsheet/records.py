@@ -0,0 +1,126 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compact records of cells and rows.
+
+Worksheets keep these instead of the gdata entries they are parsed from,
+which hold an ElementTree-backed object per attribute. Entries are built
+again only for the requests that need them. gdata is imported only then,
+so the records can be used where gdata does not run, such as the asyncio
+API on Python 3.
+"""
+
+
+def _edit_link(entry):
+    link = entry.GetEditLink()
+    return link.href if link is not None else None
+
+
+class Cell(object):
+    """A cell of the cells feed.
+    """
+    __slots__ = ('row', 'col', 'value', 'input_value', 'edit_link', 'id')
+
+    def __init__(self, row, col, value=None, input_value=None,
+                 edit_link=None, id=None):
+        """Initialise a cell.
+
+        :param row:
+            The row number - integer
+        :param col:
+            The column number - integer
+        :param value:
+            The displayed value.
+        :param input_value:
+            The value as entered, a formula for calculated cells.
+        :param edit_link:
+            The URL to update the cell at.
+        :param id:
+            The atom ID of the cell entry.
+        """
+        self.row = row
+        self.col = col
+        self.value = value
+        self.input_value = input_value
+        self.edit_link = edit_link
+        self.id = id
+
+    def __repr__(self):
+        return '<Cell R{0}C{1} {2!r}>'.format(self.row, self.col, self.value)
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Make a cell from a gdata.spreadsheet.SpreadsheetsCell."""
+        if entry.content is not None:
+            value = entry.content.text
+        else:
+            value = entry.cell.text
+        return cls(int(entry.cell.row), int(entry.cell.col),
+                   value, entry.cell.inputValue,
+                   _edit_link(entry), entry.id.text if entry.id else None)
+
+    def to_entry(self):
+        """Make a gdata.spreadsheet.SpreadsheetsCell to update the cell with.
+        """
+        import atom
+        import gdata.spreadsheet
+        return gdata.spreadsheet.SpreadsheetsCell(
+            atom_id=atom.Id(text=self.id),
+            link=[atom.Link(rel='edit', link_type='application/atom+xml',
+                            href=self.edit_link)],
+            cell=gdata.spreadsheet.Cell(row=str(self.row), col=str(self.col),
+                                        inputValue=self.input_value or ''))
+
+
+class Row(object):
+    """A row of the list feed.
+    """
+    __slots__ = ('id', 'row_id', 'edit_link', 'values')
+
+    def __init__(self, id, edit_link=None, values=None):
+        """Initialise a row.
+
+        :param id:
+            The atom ID of the list entry.
+        :param edit_link:
+            The URL to update and delete the row at.
+        :param values:
+            A dictionary of column name to value.
+        """
+        self.id = id
+        # the row ID, the last part of the atom ID, split once per entry
+        self.row_id = id.split('/')[-1] if id is not None else None
+        self.edit_link = edit_link
+        self.values = values or {}
+
+    def __repr__(self):
+        return '<Row {0}>'.format(self.row_id)
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Make a row from a gdata.spreadsheet.SpreadsheetsList."""
+        return cls(entry.id.text, _edit_link(entry),
+                   dict((key, entry.custom[key].text) for key in entry.custom))
+
+    def to_entry(self):
+        """Make a gdata.spreadsheet.SpreadsheetsList to update or delete the
+        row with.
+        """
+        import atom
+        import gdata.spreadsheet
+        return gdata.spreadsheet.SpreadsheetsList(
+            atom_id=atom.Id(text=self.id),
+            link=[atom.Link(rel='edit', link_type='application/atom+xml',
+                            href=self.edit_link)])
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Atom request bodies written without gdata.
+
+The counterpart of :mod:`google_spreadsheet.parser`: batch feeds of cell
+updates and list feed entries to insert and update rows with, written as
+the XML the service expects and returned as UTF-8 bytes.
+"""
+from xml.sax.saxutils import escape, quoteattr
+
+NAMESPACES = ('xmlns="http://www.w3.org/2005/Atom" '
+              'xmlns:gs="http://schemas.google.com/spreadsheets/2006" '
+              'xmlns:gsx="http://schemas.google.com/spreadsheets/2006/'
+              'extended" '
+              'xmlns:batch="http://schemas.google.com/gdata/batch"')
+
+if bytes is str:
+    def _text(value):
+        # Python 2 keeps text encoded, as gdata hands it out
+        if value is None:
+            return ''
+        if isinstance(value, type(u'')):
+            return value.encode('utf-8')
+        return str(value)
+
+    def _bytes(xml):
+        return xml
+else:
+    def _text(value):
+        if value is None:
+            return ''
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+        return str(value)
+
+    def _bytes(xml):
+        return xml.encode('utf-8')
+
+
+def _edit_link(href):
+    if not href:
+        return ''
+    return '<link rel="edit" type="application/atom+xml" href={0}/>'.format(
+        quoteattr(_text(href)))
+
+
+def batch_feed(cells, feed_id):
+    """Write a batch feed updating cells to their input values.
+
+    :param cells:
+        A list of :class:`~google_spreadsheet.records.Cell`. The batch ID of
+        every update is its position in the list.
+    :param feed_id:
+        The URL of the cells feed.
+    :return:
+        The feed as bytes.
+    """
+    entries = []
+    for i, cell in enumerate(cells):
+        entries.append(
+            '<entry><batch:id>{0}</batch:id>'
+            '<batch:operation type="update"/>'
+            '<id>{1}</id>{2}'
+            '<gs:cell row="{3}" col="{4}" inputValue={5}/></entry>'.format(
+                i, escape(_text(cell.id)), _edit_link(cell.edit_link),
+                cell.row, cell.col, quoteattr(_text(cell.input_value))))
+    return _bytes('<feed {0}><id>{1}</id>{2}</feed>'.format(
+        NAMESPACES, escape(_text(feed_id)), ''.join(entries)))
+
+
+def row_entry(values, row=None):
+    """Write a list feed entry holding the values of a row.
+
+    :param values:
+        A dictionary of column name to value.
+    :param row:
+        The :class:`~google_spreadsheet.records.Row` the entry updates, or
+        None for an entry inserting a new row.
+    :return:
+        The entry as bytes.
+    """
+    head = ''
+    if row is not None:
+        head = '<id>{0}</id>{1}'.format(escape(_text(row.id)),
+                                        _edit_link(row.edit_link))
+    fields = ''.join('<gsx:{0}>{1}</gsx:{0}>'.format(
+        _text(key), escape(_text(value)))
+        for key, value in sorted(values.items()))
+    return _bytes('<entry {0}>{1}{2}</entry>'.format(NAMESPACES, head, fields))
@@ -0,0 +1,207 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Write-behind sessions for worksheets.
+
+Cell writes, batches and row updates made through a session are kept in
+memory, the last value written to a cell replacing the earlier ones, and
+sent together as batched cell updates when the session is flushed.
+"""
+import threading
+
+from google_spreadsheet.batch import DEFAULT_BATCH_SIZE
+from google_spreadsheet.common import WorksheetException
+
+
+class BufferedSession(object):
+    """Buffer writes to a worksheet and send them in batches.
+
+    A session is flushed when it is closed, or left as a context manager,
+    when `max_ops` writes are buffered and `max_delay` seconds after the
+    first buffered write. Row updates are written as cell updates, in the
+    same batches as the other writes, and inserts with
+    `Worksheet.insert_rows` after them.
+
+    A flush raises :class:`~google_spreadsheet.common.WorksheetException`
+    if the server did not make some of the writes. Errors of a flush
+    triggered by the delay are raised by the next call, or by `close`.
+    """
+    def __init__(self, worksheet, max_ops=DEFAULT_BATCH_SIZE, max_delay=None,
+                 batch_size=None, diff=False):
+        """Initialise a session.
+
+        :param worksheet:
+            The :class:`~google_spreadsheet.api.Worksheet` to write to.
+        :param max_ops:
+            Flush once this many cell writes and inserts are buffered, or
+            None for no limit.
+        :param max_delay:
+            Flush at most this many seconds after the first buffered write,
+            or None to wait for the other triggers.
+        :param batch_size:
+            The maximum number of cell updates per request.
+        :param diff:
+            Leave out cells which already hold their new value.
+        """
+        self.worksheet = worksheet
+        self.max_ops = max_ops
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.diff = diff
+        self.cells = {}
+        self.inserts = []
+        self.writes = 0
+        self.flushes = 0
+        self.error = None
+        self._row_numbers = None
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.cells) + len(self.inserts)
+
+    def update_cell(self, row, col, val):
+        """Buffer a cell write.
+
+        :param row:
+            The row number - integer
+        :param col:
+            The column number - integer
+        :param val:
+            The new value.
+        """
+        with self._lock:
+            self._check()
+            self.cells[(row, col)] = val
+            self._buffered(1)
+
+    def batch(self, startxy, endxy, data):
+        """Buffer writes to a range, as `Worksheet.batch` makes them.
+
+        Cells in the range but not in the data are blanked.
+        :param startxy:
+            start row,column - integers
+        :param endxy:
+            end row,column - integers
+        :param data:
+            A list of lists where each inner list is a row
+        """
+        values = {}
+        for r in range(startxy[0], endxy[0] + 1):
+            i = r - startxy[0]
+            row = data[i] if i < len(data) else []
+            for c in range(startxy[1], endxy[1] + 1):
+                j = c - startxy[1]
+                values[(r, c)] = row[j] if j < len(row) else ''
+        with self._lock:
+            self._check()
+            self.cells.update(values)
+            self._buffered(len(values))
+
+    def update_row(self, row_data):
+        """Buffer a row update (by ID).
+
+        Only the fields supplied will be updated.
+        :param row_data:
+            A dictionary containing row data and an ID_FIELD.
+        """
+        with self._lock:
+            self._check()
+            if self._row_numbers is None:
+                self._row_numbers = self.worksheet._row_numbers()
+            values = self.worksheet._row_cells(row_data, self._row_numbers)
+            self.cells.update(values)
+            self._buffered(len(values))
+
+    def insert_row(self, row_data):
+        """Buffer a row insert.
+
+        :param row_data:
+            A dictionary containing row data.
+        """
+        with self._lock:
+            self._check()
+            self.inserts.append(dict(row_data))
+            self._buffered(1)
+
+    def flush(self):
+        """Send the buffered writes.
+
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` of the cell
+            writes, or None if there were none.
+        :raises WorksheetException:
+            If the server did not make some of the cell writes. Buffered
+            inserts are sent first.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            cells, self.cells = self.cells, {}
+            inserts, self.inserts = self.inserts, []
+            # rows may have moved, they are looked up again on the next update
+            self._row_numbers = None
+            if not cells and not inserts:
+                return None
+            self.flushes += 1
+            writer = self.worksheet.write_cells(cells, self.batch_size,
+                                                self.diff,
+                                                raise_on_error=False)
+            if inserts:
+                self.worksheet.insert_rows(inserts, self.batch_size)
+            if writer is not None and not writer.ok:
+                raise WorksheetException("Buffered write failed: '{0}'"
+                                         .format(writer.results))
+            return writer
+
+    def close(self):
+        """Flush the session.
+
+        :return:
+            The :class:`~google_spreadsheet.batch.BatchWriter` of the cell
+            writes, or None if there were none.
+        """
+        writer = self.flush()
+        with self._lock:
+            self._check()
+        return writer
+
+    def _check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _buffered(self, count):
+        self.writes += count
+        if self.max_ops is not None and len(self) >= self.max_ops:
+            self.flush()
+        elif (self.max_delay is not None and self._timer is None and
+                len(self)):
+            self._timer = threading.Timer(self.max_delay, self._flush_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        except Exception as e:
+            self.error = e
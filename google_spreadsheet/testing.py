@@ -0,0 +1,475 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""An in-memory stand-in for the Spreadsheets service.
+
+:class:`FakeSpreadsheetService` is a transport, like
+:class:`~google_spreadsheet.transport.PooledTransport`, which answers the
+requests of a gdata client itself instead of sending them. It serves the
+spreadsheets, worksheets, cells and list feeds and accepts cell updates,
+batches, row inserts, updates and deletes and worksheet resizes, so a
+:class:`~google_spreadsheet.api.Worksheet` runs against it unchanged and
+offline. Every request can be delayed to simulate the network, and is
+counted along with the bytes sent and received.
+
+Formulas are not evaluated and edit link versions are not checked. The
+structured queries and sort orders of the list feed are evaluated with
+:class:`~google_spreadsheet.query.RowIndex`, the engine of local queries,
+so the service does not check query semantics: comparing local queries
+against it only shows that the two agree with themselves.
+"""
+import calendar
+import re
+import threading
+import time
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+try:
+    from urllib.parse import urlparse, parse_qsl
+except ImportError:
+    from urlparse import urlparse, parse_qsl
+
+from google_spreadsheet.query import QueryError, RowIndex
+from google_spreadsheet.records import Row
+from google_spreadsheet.transport import _encode
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+GS = '{http://schemas.google.com/spreadsheets/2006}'
+GSX = '{http://schemas.google.com/spreadsheets/2006/extended}'
+BATCH = '{http://schemas.google.com/gdata/batch}'
+
+NAMESPACES = ('xmlns="http://www.w3.org/2005/Atom" '
+              'xmlns:gs="http://schemas.google.com/spreadsheets/2006" '
+              'xmlns:gsx="http://schemas.google.com/spreadsheets/2006/'
+              'extended" '
+              'xmlns:batch="http://schemas.google.com/gdata/batch" '
+              'xmlns:openSearch="http://a9.com/-/spec/opensearch/1.1/"')
+
+# timestamps are seconds from this epoch, one per change
+EPOCH = calendar.timegm((2012, 1, 1, 0, 0, 0))
+
+
+def _timestamp(stamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(EPOCH + stamp))
+
+
+def _stamp(timestamp):
+    return calendar.timegm(time.strptime(timestamp[:19],
+                                         '%Y-%m-%dT%H:%M:%S')) - EPOCH
+
+
+def _column_key(name):
+    """The key the list feed uses for a column name."""
+    return re.sub(r'[^0-9a-z\-.]', '', name.lower())
+
+
+class FakeResponse(object):
+    """An httplib-like response.
+    """
+    def __init__(self, status, body=b'', headers=None):
+        self.status = status
+        self.reason = {200: 'OK', 201: 'Created', 304: 'Not Modified',
+                       400: 'Bad Request', 404: 'Not Found'}.get(status, '')
+        self.msg = headers or {}
+        self.data = body
+
+    def read(self, amt=None):
+        return self.data
+
+    def getheader(self, name, default=None):
+        return self.msg.get(name, default)
+
+    def getheaders(self):
+        return list(self.msg.items())
+
+
+class FakeRow(object):
+    """A worksheet row, with the values and change stamps of its cells.
+    """
+    def __init__(self, id):
+        self.id = id
+        self.values = {}
+        self.stamps = {}
+
+
+class FakeWorksheet(object):
+    """A worksheet held in memory.
+    """
+    def __init__(self, title, rows, cols):
+        self.title = title
+        self.cols = cols
+        self.rows = []
+        self.stamp = 0
+        self._next_id = 0
+        self.resize(rows)
+
+    def _new_row(self):
+        self._next_id += 1
+        return FakeRow('r{0}'.format(self._next_id))
+
+    def resize(self, rows=None, cols=None):
+        if rows is not None:
+            del self.rows[rows:]
+            while len(self.rows) < rows:
+                self.rows.append(self._new_row())
+        if cols is not None:
+            self.cols = cols
+            for row in self.rows:
+                for col in [col for col in row.values if col > cols]:
+                    del row.values[col]
+
+    def get(self, row, col):
+        return self.rows[row - 1].values.get(col, '')
+
+    def set(self, row, col, value, stamp):
+        cells = self.rows[row - 1]
+        cells.values[col] = value or ''
+        cells.stamps[col] = stamp
+        self.stamp = stamp
+
+    def header(self):
+        """The column keys of the header row, by column."""
+        header = {}
+        for col in range(1, self.cols + 1):
+            name = self.get(1, col)
+            if not name:
+                break
+            header[col] = _column_key(name)
+        return header
+
+    def list_rows(self):
+        """The rows of the list feed, up to the first empty row."""
+        rows = []
+        for row in self.rows[1:]:
+            if not any(row.values.values()):
+                break
+            rows.append(row)
+        return rows
+
+
+class FakeSpreadsheetService(object):
+    """A transport serving spreadsheets from memory.
+
+    Use it as the `transport` of a
+    :class:`~google_spreadsheet.api.SpreadsheetAPI`, or make a gdata client
+    for it with `client`.
+    """
+    def __init__(self, latency=0.0, server='spreadsheets.google.com'):
+        """Initialise a fake service.
+
+        :param latency:
+            The seconds every request takes, or a function of the method
+            and URL returning them.
+        :param server:
+            The host name the feeds are served from.
+        """
+        self.latency = latency
+        self.server = server
+        self.spreadsheets = {}
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Set the request and byte counters back to zero."""
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.log = []
+
+    def client(self):
+        """Make a gdata client sending its requests to the service."""
+        # imported here, the service itself also runs where gdata does not
+        import gdata.spreadsheet.service
+        return gdata.spreadsheet.service.SpreadsheetsService(
+            server=self.server, http_client=self)
+
+    def add_worksheet(self, spreadsheet_key, worksheet_key, rows=100,
+                      cols=10, header=None, values=None, title=None):
+        """Add a worksheet of synthetic data.
+
+        :param rows:
+            The number of rows, the header row included.
+        :param cols:
+            The number of columns.
+        :param header:
+            The names of the columns, defaults to 'col1', 'col2', ...
+        :param values:
+            A function of the row and column numbers returning the value of
+            a cell below the header row, defaults to 'r2c1', 'r2c2', ...
+        :return:
+            The :class:`FakeWorksheet`.
+        """
+        worksheet = FakeWorksheet(title or worksheet_key, rows, cols)
+        header = header or ['col{0}'.format(col) for col in range(1, cols + 1)]
+        for col, name in enumerate(header, 1):
+            worksheet.set(1, col, name, 0)
+        values = values or (lambda row, col: 'r{0}c{1}'.format(row, col))
+        for row in range(2, rows + 1):
+            for col in range(1, cols + 1):
+                worksheet.set(row, col, values(row, col), 0)
+        self.spreadsheets.setdefault(spreadsheet_key, {})[worksheet_key] = \
+            worksheet
+        return worksheet
+
+    def request(self, operation, url, data=None, headers=None):
+        """Answer a request.
+
+        :return:
+            A :class:`FakeResponse`.
+        """
+        data = _encode(data) or b''
+        latency = self.latency
+        if callable(latency):
+            latency = latency(operation, url)
+        if latency:
+            time.sleep(latency)
+        with self.lock:
+            response = self._dispatch(operation.upper(), urlparse(str(url)),
+                                      data, headers or {})
+            self.requests += 1
+            self.bytes_sent += len(data)
+            self.bytes_received += len(response.data)
+            self.log.append((operation, str(url), response.status))
+        return response
+
+    def _dispatch(self, operation, url, data, headers):
+        path = url.path.split('/')[2:]
+        query = dict(parse_qsl(url.query))
+        try:
+            if path[:1] == ['spreadsheets']:
+                return self._spreadsheets()
+            if path[:1] == ['worksheets']:
+                return self._worksheets(operation, path[1], path[4:], data)
+            worksheet = self.spreadsheets[path[1]][path[2]]
+            base = self._base(path[0], path[1], path[2])
+            rest = path[5:]
+            if path[0] == 'cells':
+                if rest == ['batch']:
+                    return self._batch(worksheet, base, data)
+                if rest:
+                    return self._cell(operation, worksheet, base, rest[0],
+                                      data)
+                return self._cells_feed(worksheet, base, query, headers)
+            if path[0] == 'list':
+                if rest:
+                    return self._row(operation, worksheet, base, rest[0],
+                                     data)
+                if operation == 'POST':
+                    return self._insert_row(worksheet, base, data)
+                return self._list_feed(worksheet, base, query, headers)
+        except (KeyError, IndexError, ValueError):
+            pass
+        except QueryError as e:
+            return FakeResponse(400, str(e).encode('utf-8'))
+        return FakeResponse(404, b'Not found')
+
+    def _base(self, feed, *keys):
+        return 'https://{0}/feeds/{1}/{2}/private/full'.format(
+            self.server, feed, '/'.join(keys))
+
+    def _feed(self, base, entries, updated=0, batch=False, total=None):
+        links = ''
+        if batch:
+            links = ('<link rel="http://schemas.google.com/g/2005#batch" '
+                     'type="application/atom+xml" href="{0}/batch"/>'.format(
+                         base))
+        if total is not None:
+            links += '<openSearch:totalResults>{0}</openSearch:totalResults>' \
+                .format(total)
+        return '<feed {0}><id>{1}</id><updated>{2}</updated>{3}{4}</feed>' \
+            .format(NAMESPACES, base, _timestamp(updated), links,
+                    ''.join(entries))
+
+    def _response(self, body, status=200, etag=None):
+        headers = {'Content-Type': 'application/atom+xml'}
+        if etag is not None:
+            headers['ETag'] = etag
+        return FakeResponse(status, body.encode('utf-8'), headers)
+
+    def _entry_response(self, entry, status=200):
+        return self._response(entry.replace(
+            '<entry>', '<entry {0}>'.format(NAMESPACES), 1), status)
+
+    def _conditional(self, worksheet, headers, make_body):
+        etag = 'W/"{0}"'.format(worksheet.stamp)
+        if headers.get('If-None-Match') == etag:
+            return FakeResponse(304, b'', {'ETag': etag})
+        return self._response(make_body(), etag=etag)
+
+    def _spreadsheets(self):
+        base = 'https://{0}/feeds/spreadsheets/private/full'.format(
+            self.server)
+        entries = ['<entry><id>{0}/{1}</id><title>{1}</title></entry>'.format(
+            base, escape(key)) for key in sorted(self.spreadsheets)]
+        return self._response(self._feed(base, entries))
+
+    def _worksheet_entry(self, base, key, worksheet):
+        return ('<entry><id>{0}/{1}</id><title>{2}</title>'
+                '<link rel="edit" type="application/atom+xml" '
+                'href="{0}/{1}/1"/>'
+                '<gs:rowCount>{3}</gs:rowCount><gs:colCount>{4}</gs:colCount>'
+                '</entry>').format(base, key, escape(worksheet.title),
+                                   len(worksheet.rows), worksheet.cols)
+
+    def _worksheets(self, operation, spreadsheet_key, rest, data):
+        worksheets = self.spreadsheets[spreadsheet_key]
+        base = self._base('worksheets', spreadsheet_key)
+        if not rest:
+            entries = [self._worksheet_entry(base, key, worksheets[key])
+                       for key in sorted(worksheets)]
+            return self._response(self._feed(base, entries))
+        worksheet = worksheets[rest[0]]
+        if operation == 'PUT':
+            entry = ElementTree.fromstring(data)
+            worksheet.resize(int(entry.find(GS + 'rowCount').text),
+                             int(entry.find(GS + 'colCount').text))
+            worksheet.stamp += 1
+        return self._entry_response(
+            self._worksheet_entry(base, rest[0], worksheet))
+
+    def _cell_entry(self, base, worksheet, row, col, extra=''):
+        value = worksheet.get(row, col)
+        cell_id = '{0}/R{1}C{2}'.format(base, row, col)
+        return ('<entry>{0}<id>{1}</id>'
+                '<link rel="edit" type="application/atom+xml" '
+                'href="{1}/1"/><content type="text">{2}</content>'
+                '<gs:cell row="{3}" col="{4}" inputValue={5}>{2}</gs:cell>'
+                '</entry>').format(extra, cell_id, escape(value), row, col,
+                                   quoteattr(value))
+
+    def _cells_feed(self, worksheet, base, query, headers):
+        def make_body():
+            min_row = int(query.get('min-row', 1))
+            max_row = min(int(query.get('max-row', len(worksheet.rows))),
+                          len(worksheet.rows))
+            min_col = int(query.get('min-col', 1))
+            max_col = min(int(query.get('max-col', worksheet.cols)),
+                          worksheet.cols)
+            empty = query.get('return-empty') == 'true'
+            since = query.get('updated-min')
+            since = _stamp(since) if since else None
+            entries = []
+            for row in range(min_row, max_row + 1):
+                cells = worksheet.rows[row - 1]
+                for col in range(min_col, max_col + 1):
+                    if not empty and not cells.values.get(col):
+                        continue
+                    if since is not None and cells.stamps.get(col, 0) < since:
+                        continue
+                    entries.append(self._cell_entry(base, worksheet, row,
+                                                    col))
+            return self._feed(base, entries, worksheet.stamp, batch=True)
+        return self._conditional(worksheet, headers, make_body)
+
+    def _next_stamp(self, worksheet):
+        return worksheet.stamp + 1
+
+    def _cell(self, operation, worksheet, base, name, data):
+        row, col = [int(n) for n in re.match(r'R(\d+)C(\d+)$', name).groups()]
+        if row > len(worksheet.rows) or col > worksheet.cols:
+            raise KeyError(name)
+        if operation == 'PUT':
+            cell = ElementTree.fromstring(data).find(GS + 'cell')
+            worksheet.set(row, col, cell.get('inputValue'),
+                          self._next_stamp(worksheet))
+        return self._entry_response(
+            self._cell_entry(base, worksheet, row, col))
+
+    def _batch(self, worksheet, base, data):
+        stamp = self._next_stamp(worksheet)
+        entries = []
+        for entry in ElementTree.fromstring(data).findall(ATOM + 'entry'):
+            batch_id = entry.find(BATCH + 'id')
+            batch_id = batch_id.text if batch_id is not None else ''
+            cell = entry.find(GS + 'cell')
+            row, col = int(cell.get('row')), int(cell.get('col'))
+            extra = '<batch:id>{0}</batch:id>'.format(escape(batch_id))
+            if row > len(worksheet.rows) or col > worksheet.cols:
+                entries.append('<entry>{0}<batch:status code="404" '
+                               'reason="Not Found"/></entry>'.format(extra))
+                continue
+            worksheet.set(row, col, cell.get('inputValue'), stamp)
+            extra += '<batch:status code="200" reason="Success"/>'
+            entries.append(self._cell_entry(base, worksheet, row, col, extra))
+        return self._response(self._feed(base, entries, worksheet.stamp))
+
+    def _row_entry(self, base, worksheet, row, header=None):
+        header = header or worksheet.header()
+        values = ''.join('<gsx:{0}>{1}</gsx:{0}>'.format(
+            key, escape(row.values.get(col, '')))
+            for col, key in sorted(header.items()))
+        return ('<entry><id>{0}/{1}</id>'
+                '<link rel="edit" type="application/atom+xml" '
+                'href="{0}/{1}/1"/>{2}</entry>').format(base, row.id, values)
+
+    def _list_feed(self, worksheet, base, query, headers):
+        def make_body():
+            header = worksheet.header()
+            rows = worksheet.list_rows()
+            # not an independent evaluator, see the module docstring
+            if ('sq' in query or 'orderby' in query or
+                    'reverse' in query):
+                records = [Row(row.id, None, dict(
+                    (key, row.values.get(col, ''))
+                    for col, key in header.items())) for row in rows]
+                by_id = dict((row.id, row) for row in rows)
+                rows = [by_id[record.id] for record in RowIndex(records)
+                        .select(query.get('sq'), query.get('orderby'),
+                                query.get('reverse'))]
+            total = len(rows)
+            start = int(query.get('start-index', 1)) - 1
+            if 'max-results' in query:
+                rows = rows[start:start + int(query['max-results'])]
+            else:
+                rows = rows[start:]
+            entries = [self._row_entry(base, worksheet, row, header)
+                       for row in rows]
+            return self._feed(base, entries, worksheet.stamp, total=total)
+        return self._conditional(worksheet, headers, make_body)
+
+    def _find_row(self, worksheet, row_id):
+        for number, row in enumerate(worksheet.rows, 1):
+            if row.id == row_id:
+                return number, row
+        raise KeyError(row_id)
+
+    def _write_row(self, worksheet, number, data):
+        columns = dict((key, col) for col, key in worksheet.header().items())
+        stamp = self._next_stamp(worksheet)
+        for element in ElementTree.fromstring(data):
+            if element.tag.startswith(GSX):
+                col = columns.get(element.tag[len(GSX):])
+                if col is not None:
+                    worksheet.set(number, col, element.text, stamp)
+
+    def _insert_row(self, worksheet, base, data):
+        number = len(worksheet.list_rows()) + 2
+        if number > len(worksheet.rows):
+            worksheet.resize(number)
+        self._write_row(worksheet, number, data)
+        row = worksheet.rows[number - 1]
+        return self._entry_response(self._row_entry(base, worksheet, row),
+                                    status=201)
+
+    def _row(self, operation, worksheet, base, row_id, data):
+        number, row = self._find_row(worksheet, row_id)
+        if operation == 'DELETE':
+            del worksheet.rows[number - 1]
+            worksheet.stamp += 1
+            return FakeResponse(200, b'')
+        if operation == 'PUT':
+            self._write_row(worksheet, number, data)
+        return self._entry_response(self._row_entry(base, worksheet, row))
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012 Yoav Aviram.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""HTTP transports for the gdata client.
+
+A transport is any object with a `request(operation, url, data=None,
+headers=None)` method returning an httplib-like response, which is what the
+gdata client expects of its `http_client`.
+"""
+from xml.etree import ElementTree
+
+import urllib3
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 60
+
+
+def _encode(data):
+    """Turn request data, as the gdata client passes it, into bytes."""
+    if data is None:
+        return None
+    if isinstance(data, list):
+        return b''.join(_encode(part) for part in data)
+    if hasattr(data, 'read'):
+        data = data.read()
+    elif ElementTree.iselement(data):
+        data = ElementTree.tostring(data)
+    elif not isinstance(data, (bytes, type(u''))):
+        data = str(data)
+    if isinstance(data, type(u'')):
+        data = data.encode('utf-8')
+    return data
+
+
+class TransportResponse(object):
+    """An httplib-like response.
+    """
+    def __init__(self, response):
+        """Initialise a response.
+
+        :param response:
+            A fully read urllib3.HTTPResponse.
+        """
+        self.status = response.status
+        self.reason = response.reason
+        self.msg = response.headers
+        self.data = response.data
+
+    def read(self, amt=None):
+        return self.data
+
+    def getheader(self, name, default=None):
+        return self.msg.get(name, default)
+
+    def getheaders(self):
+        return list(self.msg.items())
+
+
+class PooledTransport(object):
+    """A keep-alive transport backed by a thread safe pool of connections.
+
+    Connections, and with them their TLS sessions, are kept open and reused
+    by every request made through the transport.
+    """
+    debug = False
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 connect_timeout=None):
+        """Initialise a pooled transport.
+
+        :param pool_size:
+            The number of connections kept open per host. Requests beyond
+            that wait for a free connection.
+        :param timeout:
+            The read timeout in seconds.
+        :param connect_timeout:
+            The connect timeout in seconds, defaults to the read timeout.
+        """
+        self.pool_size = pool_size
+        self.pool = urllib3.PoolManager(
+            maxsize=pool_size, block=True, retries=False,
+            timeout=urllib3.Timeout(connect=connect_timeout or timeout,
+                                    read=timeout))
+
+    def request(self, operation, url, data=None, headers=None):
+        """Make a request.
+
+        :param operation:
+            The HTTP method.
+        :param url:
+            The URL, a string or an atom.url.Url.
+        :param data:
+            The request body.
+        :param headers:
+            A dictionary of request headers.
+        :return:
+            A :class:`TransportResponse`.
+        """
+        response = self.pool.urlopen(operation, str(url), body=_encode(data),
+                                     headers=headers or {}, redirect=False)
+        return TransportResponse(response)
+
+    def close(self):
+        """Close every pooled connection."""
+        self.pool.clear()
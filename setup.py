@@ -28,5 +28,7 @@ setup(name='python-google-spreadsheet',
       packages=find_packages(exclude=['ez_setup', 'examples', 'tests']),
       include_package_data=True,
       zip_safe=True,
-      install_requires=["gdata"],
+      install_requires=["gdata", "urllib3",
+                        'futures; python_version < "3"'],
+      extras_require={"async": ["aiohttp"], "frame": ["pandas"]},
       )
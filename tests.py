@@ -1,3 +1,5 @@
+import tempfile
+import time
 from unittest import TestCase
 
 from nose.tools import assert_equals, assert_true
@@ -63,6 +65,70 @@ class TestSpreadsheetAPI(TestCase):
             GOOGLE_WORKSHEET_KEY)
         assert_true(sheet)
 
+    def test_shared_transport(self):
+        """Test Shared Transport.
+
+        Tests that worksheets make their requests through the pooled
+        transport of the API object.
+        """
+        sheet = self.spreadsheet.get_worksheet(GOOGLE_SPREADSHEET_KEY,
+            GOOGLE_WORKSHEET_KEY)
+        assert_true(sheet.gd_client.http_client is self.spreadsheet.transport)
+
+    def test_load_worksheets(self):
+        """Test Load Worksheets.
+
+        Tests that worksheets loaded concurrently come back loaded, with
+        errors reported per worksheet.
+        """
+        keys = [(GOOGLE_SPREADSHEET_KEY, GOOGLE_WORKSHEET_KEY),
+                (GOOGLE_SPREADSHEET_KEY, 'no-such-worksheet')]
+        results = dict((result.worksheet_key, result) for result in
+                       self.spreadsheet.load_worksheets(keys, max_workers=2))
+        assert_true(results[GOOGLE_WORKSHEET_KEY].worksheet._loaded)
+        assert_true(results['no-such-worksheet'].error is not None)
+
+    def test_rate_limit(self):
+        """Test Rate Limit.
+
+        Tests that requests made within a per-minute quota are spaced out
+        rather than sent at once.
+        """
+        spreadsheet = SpreadsheetAPI(GOOGLE_SPREADSHEET_USER,
+            GOOGLE_SPREADSHEET_PASSWORD, GOOGLE_SPREADSHEET_SOURCE,
+            requests_per_minute=60)
+        start = time.time()
+        for i in range(3):
+            spreadsheet.list_worksheets(GOOGLE_SPREADSHEET_KEY)
+        assert_true(time.time() - start >= 2)
+
+    def test_header_only(self):
+        """Test Header Only.
+
+        Tests that the header row fetched alone matches the one read from
+        the cells feed, and that the cells are not loaded for it.
+        """
+        sheet = self.spreadsheet.get_worksheet(GOOGLE_SPREADSHEET_KEY,
+            GOOGLE_WORKSHEET_KEY, header_only=True)
+        header_row = sheet.header_row
+        assert_true(not sheet._loaded)
+        assert_equals(header_row, sheet.set_header_row())
+
+    def test_snapshot_cache(self):
+        """Test Snapshot Cache.
+
+        Tests that a worksheet opened a second time through the cache has
+        the same cells and rows.
+        """
+        spreadsheet = SpreadsheetAPI(GOOGLE_SPREADSHEET_USER,
+            GOOGLE_SPREADSHEET_PASSWORD, GOOGLE_SPREADSHEET_SOURCE,
+            cache_dir=tempfile.mkdtemp())
+        sheets = [spreadsheet.get_worksheet(GOOGLE_SPREADSHEET_KEY,
+            GOOGLE_WORKSHEET_KEY) for i in range(2)]
+        assert_equals(sheets[0].header_row, sheets[1].header_row)
+        assert_equals(len(sheets[0].cell_index), len(sheets[1].cell_index))
+        assert_equals(sheets[0].get_rows(), sheets[1].get_rows())
+
 
 class TestWorksheet(TestCase):
     """Test Worksheet Class
@@ -186,6 +252,31 @@ class TestWorksheet(TestCase):
             query='{0} = {1}'.format(COLUMN_NAME, COLUMN_UNIQUE_VALUE))
         assert_equals(len(rows), 1)
 
+    def test_query_cache(self):
+        """Test Query Cache.
+
+        Tests that alternating between queries reuses their cached results.
+        """
+        query = '{0} = {1}'.format(COLUMN_NAME, COLUMN_UNIQUE_VALUE)
+        rows = self.sheet.get_rows()
+        queried = self.sheet.get_rows(query=query)
+        entries = self.sheet.entries
+        assert_equals(rows, self.sheet.get_rows())
+        assert_equals(queried, self.sheet.get_rows(query=query))
+        assert_true(self.sheet.entries is entries)
+        assert_equals(len(self.sheet.results), 2)
+
+    def test_local_query(self):
+        """Test Local Query.
+
+        Tests that a query evaluated in memory returns the rows the
+        service returns.
+        """
+        query = '{0} = {1}'.format(COLUMN_NAME, COLUMN_UNIQUE_VALUE)
+        rows = self.sheet.get_rows(query=query)
+        self.sheet._flush_cache()
+        assert_equals(rows, self.sheet.get_rows(query=query, local=True))
+
     def test_sort(self):
         """Test Sort.
 
@@ -204,3 +295,195 @@ class TestWorksheet(TestCase):
             filter_func=lambda row: row[COLUMN_NAME] == unicode(
                 COLUMN_UNIQUE_VALUE))
         assert_equals(1, len(filtered_rows))
+
+    def test_find_cell(self):
+        """Test Find Cell.
+
+        Looks up the first header cell through the cell index.
+        """
+        cell = self.sheet.find_cell(1, 1)
+        assert_equals(cell.value, self.sheet.header_row[0])
+        assert_equals(self.sheet.find_cell('1', '1'), cell)
+        assert_equals((cell.row, cell.col), (1, 1))
+        assert_true(cell.edit_link)
+
+    def test_find_cell_by_contents(self):
+        """Test Find Cell By Contents.
+
+        Looks up a header cell by its contents, anywhere and in its column.
+        """
+        header = self.sheet.header_row[0]
+        cell = self.sheet.find_cell_by_contents(header)
+        assert_equals(cell.value, header)
+        assert_equals(self.sheet.cell_index.find_key(header), cell)
+
+    def test_load_empty_cells(self):
+        """Test Load Empty Cells.
+
+        Loads the empty cell right of the header row so it can be batched.
+        """
+        col = len(self.sheet.header_row) + 1
+        assert_equals(self.sheet.find_cell(1, col), None)
+        self.sheet.load_empty_cells((1, col), (1, col))
+        assert_true(self.sheet.find_cell(1, col) is not None)
+
+    def test_refresh(self):
+        """Test Refresh.
+
+        Changes a cell behind the back of the worksheet and refreshes it.
+        """
+        other = self.spreadsheet.get_worksheet(GOOGLE_SPREADSHEET_KEY,
+            GOOGLE_WORKSHEET_KEY)
+        cell = self.sheet.find_cell(2, 1)
+        value = cell.value
+        other.update_cell(2, 1, value + '-refreshed')
+        try:
+            changed = self.sheet.refresh()
+            assert_true(cell in changed)
+            assert_equals(cell.value, value + '-refreshed')
+        finally:
+            other.update_cell(2, 1, value)
+
+    def test_load_range(self):
+        """Test Load Range.
+
+        Tests that a batch on a fresh worksheet loads only its own range.
+        """
+        sheet = self.spreadsheet.get_worksheet(GOOGLE_SPREADSHEET_KEY,
+            GOOGLE_WORKSHEET_KEY)
+        cell = self.sheet.find_cell(2, 1)
+        writer = sheet.batch((2, 1), (2, 1), [[cell.value]])
+        assert_true(writer.ok)
+        assert_true(not sheet._loaded)
+        assert_equals(sheet.find_cell(2, 1).value, cell.value)
+
+    def test_batch_chunks(self):
+        """Test Batch Chunks.
+
+        Rewrites the header row one cell per request.
+        """
+        header = self.sheet.header_row
+        writer = self.sheet.batch((1, 1), (1, len(header)), [header],
+                                  batch_size=1)
+        assert_true(writer.ok)
+        assert_equals(writer.sent, len(header))
+        assert_equals(len(writer.results), len(header))
+
+    def test_batch_diff(self):
+        """Test Batch Diff.
+
+        Writes the current values of a range back with diff on, which
+        sends nothing.
+        """
+        data = [[self.sheet.find_cell(r, c).value or ''
+                 for c in range(1, 3)] for r in range(2, 4)]
+        writer = self.sheet.batch((2, 1), (3, 2), data, diff=True)
+        assert_equals(writer.sent, 0)
+        assert_equals(writer.skipped, 4)
+
+    def test_buffered(self):
+        """Test Buffered.
+
+        Writes a cell many times in a buffered session, which sends only
+        the last value in a single batch.
+        """
+        value = self.sheet.find_cell(2, 1).value or ''
+        with self.sheet.buffered() as session:
+            for i in range(10):
+                session.update_cell(2, 1, 'buffered {0}'.format(i))
+            session.update_cell(2, 1, value)
+            assert_equals(len(session), 1)
+        assert_equals(session.flushes, 1)
+        assert_equals(self.sheet.find_cell(2, 1).value or '', value)
+
+    def test_frame(self):
+        """Test Frame.
+
+        Reads the worksheet into a DataFrame and writes it back unchanged.
+        """
+        frame = self.sheet.to_frame(coerce=False)
+        assert_equals(list(frame.columns), self.sheet.header_row)
+        assert_equals(len(frame), len(self.sheet.get_rows()))
+        writer = self.sheet.write_frame(frame, diff=True)
+        assert_equals(writer.sent, 0)
+
+    def test_insert_rows(self):
+        """Test Insert Rows.
+
+        Inserts two rows in bulk, than deletes them again.
+        """
+        rows = self.sheet.get_rows()
+        num_rows = len(rows)
+        new_rows = self.sheet.insert_rows([rows[0], rows[0]])
+        assert_equals(len(new_rows), 2)
+        self.sheet._flush_cache()
+        assert_equals(len(self.sheet.get_rows()), num_rows + 2)
+        for row in new_rows:
+            self.sheet.delete_row(row)
+        assert_equals(len(self.sheet.get_rows()), num_rows)
+
+    def test_insert_rows_after_insert_row(self):
+        """Test Insert Rows After Insert Row.
+
+        Inserts a row through the list feed after the cells are loaded, than
+        a row in bulk, and checks that both are kept.
+        """
+        rows = self.sheet.get_rows()
+        num_rows = len(rows)
+        self.sheet.cells
+        row = self.sheet.insert_row(rows[0])
+        new_rows = self.sheet.insert_rows([rows[-1]])
+        self.sheet._flush_cache()
+        assert_equals(len(self.sheet.get_rows()), num_rows + 2)
+        for row in [row] + new_rows:
+            self.sheet.delete_row(row)
+        assert_equals(len(self.sheet.get_rows()), num_rows)
+
+    def test_delete_rows(self):
+        """Test Delete Rows.
+
+        Inserts two rows, than deletes both in bulk.
+        """
+        rows = self.sheet.get_rows()
+        num_rows = len(rows)
+        new_rows = self.sheet.insert_rows([rows[0], rows[-1]])
+        writer = self.sheet.delete_rows(new_rows)
+        assert_true(writer.ok)
+        delete_rows = self.sheet.get_rows()
+        assert_equals(len(delete_rows), num_rows)
+        assert_equals(delete_rows[-1], rows[-1])
+
+    def test_delete_rows_keeps_row_ids(self):
+        """Test Delete Rows Keeps Row IDs.
+
+        Inserts three rows, deletes the first and the last in bulk, and
+        checks that the one left keeps its row ID and values.
+        """
+        rows = self.sheet.get_rows()
+        num_rows = len(rows)
+        new_rows = self.sheet.insert_rows([rows[0], rows[-1], rows[0]])
+        writer = self.sheet.delete_rows([new_rows[0], new_rows[2]])
+        assert_true(writer.ok)
+        delete_rows = self.sheet.get_rows()
+        assert_equals(len(delete_rows), num_rows + 1)
+        assert_equals(delete_rows[-1], new_rows[1])
+        self.sheet.delete_row(new_rows[1])
+
+    def test_executor(self):
+        """Test Executor.
+
+        Updates every row with its own values concurrently.
+        """
+        rows = self.sheet.get_rows()
+        with self.sheet.executor(max_workers=4) as executor:
+            results = [executor.update_row(row) for row in rows]
+        assert_equals([future.result() for future in results], rows)
+
+    def test_iter_rows(self):
+        """Test Iter Rows.
+
+        Pages through the rows two at a time.
+        """
+        rows = self.sheet.get_rows()
+        assert_equals(list(self.sheet.iter_rows(page_size=2)), rows)
+
@@ -0,0 +1,182 @@
+"""Tests of the asyncio API.
+
+Requires Python 3 and aiohttp. The requests are answered by
+google_spreadsheet.testing.FakeSpreadsheetService, so the tests run offline
+and without credentials.
+"""
+import asyncio
+from unittest import TestCase
+
+from google_spreadsheet.aio import AsyncSpreadsheetAPI
+from google_spreadsheet.common import (ID_FIELD, RequestError,
+                                       WorksheetException)
+from google_spreadsheet.testing import FakeSpreadsheetService
+
+SPREADSHEET_KEY = 'key'
+WORKSHEET_KEY = 'od6'
+
+
+class SessionResponse(object):
+    """An aiohttp response stand-in for a fake service response."""
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status
+        self.reason = response.reason
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def read(self):
+        return self.response.read()
+
+
+class FakeSession(object):
+    """An aiohttp.ClientSession stand-in sending requests to a fake service.
+    """
+    def __init__(self, service):
+        self.service = service
+
+    def request(self, method, url, data=None, headers=None):
+        return SessionResponse(self.service.request(method, url, data,
+                                                    headers))
+
+    async def close(self):
+        pass
+
+
+class TestAsyncWorksheet(TestCase):
+    """Test the asyncio Worksheet
+
+    Test Class for AsyncWorksheet, against a fake service holding a
+    worksheet of a header and 5 rows.
+    """
+    def setUp(self):
+        self.service = FakeSpreadsheetService()
+        self.service.add_worksheet(SPREADSHEET_KEY, WORKSHEET_KEY, rows=6,
+                                   cols=3)
+        self.api = AsyncSpreadsheetAPI('token',
+                                       session=FakeSession(self.service))
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_list_worksheets(self):
+        """Test List Worksheets.
+
+        Tests that the worksheets feed is parsed into (title, key) pairs.
+        """
+        sheets = self.run_async(self.api.list_worksheets(SPREADSHEET_KEY))
+        self.assertEqual(sheets, [(WORKSHEET_KEY, WORKSHEET_KEY)])
+
+    def test_get_rows(self):
+        """Test Get Rows.
+
+        Tests that the list feed is read, and queried on the server.
+        """
+        async def run():
+            sheet = await self.api.get_worksheet(SPREADSHEET_KEY,
+                                                 WORKSHEET_KEY)
+            rows = await sheet.get_rows()
+            queried = await sheet.get_rows(query='col1 = "r4c1"')
+            return sheet, rows, queried
+        sheet, rows, queried = self.run_async(run())
+        self.assertEqual(sheet.header_row, ['col1', 'col2', 'col3'])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['col2'], 'r2c2')
+        self.assertEqual([row['col1'] for row in queried], ['r4c1'])
+
+    def test_update_insert_delete_row(self):
+        """Test Update, Insert and Delete Row.
+
+        Tests that list entries written without gdata are accepted, and
+        that the rows returned are the ones written.
+        """
+        async def run():
+            sheet = await self.api.get_worksheet(SPREADSHEET_KEY,
+                                                 WORKSHEET_KEY)
+            rows = await sheet.get_rows()
+            updated = await sheet.update_row({ID_FIELD: rows[1][ID_FIELD],
+                                              'col2': 'a & <b>'})
+            inserted = await sheet.insert_row({'col1': 'new', 'col3': 'x'})
+            await sheet.delete_row(rows[0])
+            return updated, inserted, await sheet.get_rows()
+        updated, inserted, rows = self.run_async(run())
+        self.assertEqual(updated['col1'], 'r3c1')
+        self.assertEqual(updated['col2'], 'a & <b>')
+        self.assertEqual(inserted['col1'], 'new')
+        self.assertEqual([row['col1'] for row in rows],
+                         ['r3c1', 'r4c1', 'r5c1', 'r6c1', 'new'])
+
+    def test_batch(self):
+        """Test Batch.
+
+        Tests that a batch written without gdata updates the cells, empty
+        ones included, and that the updated cells are stored back.
+        """
+        async def run():
+            sheet = await self.api.get_worksheet(SPREADSHEET_KEY,
+                                                 WORKSHEET_KEY, batch_size=2)
+            await sheet.batch((2, 1), (2, 1), [['']])
+            sheet = await self.api.get_worksheet(SPREADSHEET_KEY,
+                                                 WORKSHEET_KEY, batch_size=2)
+            writer = await sheet.batch((2, 1), (3, 2),
+                                       [['a', 'b'], ['c', 'd']])
+            return sheet, writer
+        sheet, writer = self.run_async(run())
+        self.assertTrue(writer.ok)
+        self.assertEqual(len(writer.results), 2)
+        self.assertEqual(sheet.find_cell(2, 1).value, 'a')
+        worksheet = self.service.spreadsheets[SPREADSHEET_KEY][WORKSHEET_KEY]
+        self.assertEqual([worksheet.get(2, 1), worksheet.get(3, 2)],
+                         ['a', 'd'])
+
+    def test_request_error(self):
+        """Test Request Error.
+
+        Tests that error responses raise a RequestError with the status.
+        """
+        with self.assertRaises(RequestError) as context:
+            self.run_async(self.api.get_worksheet(SPREADSHEET_KEY,
+                                                  'no-such-worksheet'))
+        self.assertEqual(context.exception.args[0]['status'], 404)
+
+    def test_batch_error(self):
+        """Test Batch Error.
+
+        Tests that a batch the server rejects raises.
+        """
+        async def run():
+            sheet = await self.api.get_worksheet(SPREADSHEET_KEY,
+                                                 WORKSHEET_KEY)
+            self.service.spreadsheets[SPREADSHEET_KEY][WORKSHEET_KEY].resize(
+                rows=2)
+            await sheet.batch((2, 1), (3, 1), [['a'], ['b']])
+        with self.assertRaises(WorksheetException):
+            self.run_async(run())
+
+    def test_batch_rollback(self):
+        """Test Batch Rollback.
+
+        Tests that cells whose update the server rejects get their previous
+        values back, so a diff batch sends them again.
+        """
+        async def run():
+            sheet = await self.api.get_worksheet(SPREADSHEET_KEY,
+                                                 WORKSHEET_KEY)
+            worksheet = self.service.spreadsheets[SPREADSHEET_KEY][
+                WORKSHEET_KEY]
+            worksheet.resize(rows=2)
+            failed = await sheet.batch((2, 1), (3, 1), [['a'], ['b']],
+                                       raise_on_error=False)
+            value = sheet.find_cell(3, 1).value
+            worksheet.resize(rows=6)
+            retried = await sheet.batch((2, 1), (3, 1), [['a'], ['b']],
+                                        diff=True)
+            return failed, value, retried
+        failed, value, retried = self.run_async(run())
+        self.assertFalse(failed.ok)
+        self.assertEqual(value, 'r3c1')
+        self.assertEqual((retried.sent, retried.skipped), (1, 1))
@@ -0,0 +1,54 @@
+"""Tests of the DataFrame conversion.
+
+Requires pandas, but neither gdata nor a worksheet.
+"""
+from unittest import TestCase
+
+from google_spreadsheet.frame import cells_to_frame, frame_to_rows
+
+
+class TestFrame(TestCase):
+    """Test Frame Conversion
+
+    Test Class for the DataFrame conversion, which needs no worksheet.
+    """
+    def test_coerce_round_trip(self):
+        """Test Coerce Round Trip.
+
+        Coerces an integer column with a blank, which pandas holds as
+        floats, and turns it back into the values it was read from.
+        """
+        grid = [['n', 's'], ['1', 'a'], ['', 'b'], ['3', ''], ['0.5', 'c']]
+        cells = dict(((r, c), value)
+                     for r, row in enumerate(grid[1:])
+                     for c, value in enumerate(row) if value)
+        frame = cells_to_frame(cells, grid[0], coerce=True)
+        self.assertEqual(frame['n'].dtype.kind, 'f')
+        self.assertEqual(frame_to_rows(frame), grid)
+
+    def test_coerce_keeps_text(self):
+        """Test Coerce Keeps Text.
+
+        Leaves columns as text whose numbers would be written back
+        differently: leading and trailing zeros, exponents and more digits
+        than a float holds.
+        """
+        grid = [['zip', 'price', 'rate', 'exp', 'id'],
+                ['02134', '1.50', '1.10', '1e3', '12345678901234567891'],
+                ['10001', '2', '0.5', '2', '1']]
+        cells = dict(((r, c), value)
+                     for r, row in enumerate(grid[1:])
+                     for c, value in enumerate(row) if value)
+        frame = cells_to_frame(cells, grid[0], coerce=True)
+        self.assertEqual([frame[name].dtype.kind for name in grid[0]],
+                         ['O'] * 5)
+        self.assertEqual(frame_to_rows(frame), grid)
+
+    def test_no_coerce_by_default(self):
+        """Test No Coerce By Default.
+
+        Leaves numbers as the text they were read as, unless asked to.
+        """
+        frame = cells_to_frame({(0, 0): '1', (1, 0): '2'}, ['n'])
+        self.assertEqual(frame['n'].dtype.kind, 'O')
+        self.assertEqual(frame_to_rows(frame), [['n'], ['1'], ['2']])
@@ -0,0 +1,245 @@
+"""Tests of the Worksheet API which run offline.
+
+Requires gdata. The requests are answered by
+google_spreadsheet.testing.FakeSpreadsheetService, so the tests run
+without credentials or a test_settings.py.
+"""
+from unittest import TestCase
+
+from google_spreadsheet.api import ID_FIELD, Worksheet, WorksheetException
+from google_spreadsheet.cache import ResultCache
+from google_spreadsheet.testing import FakeResponse, FakeSpreadsheetService
+
+SPREADSHEET_KEY = 'key'
+WORKSHEET_KEY = 'od6'
+
+
+class TestOfflineWorksheet(TestCase):
+    """Test the Worksheet offline
+
+    Test Class for Worksheet, against a fake service holding a worksheet of
+    a header and 5 rows, with room for 3 more.
+    """
+    def setUp(self):
+        self.service = FakeSpreadsheetService()
+        self.worksheet = self.service.add_worksheet(
+            SPREADSHEET_KEY, WORKSHEET_KEY, rows=9, cols=3,
+            values=lambda row, col: ('r{0}c{1}'.format(row, col)
+                                     if row <= 6 else ''))
+        self.sheet = self.open_sheet()
+
+    def open_sheet(self, **kwargs):
+        return Worksheet(self.service.client(), SPREADSHEET_KEY,
+                         WORKSHEET_KEY, **kwargs)
+
+    def column(self, col=1):
+        return [self.worksheet.get(row, col)
+                for row in range(1, len(self.worksheet.rows) + 1)]
+
+    def set_value(self, row, col, value):
+        self.worksheet.set(row, col, value, self.worksheet.stamp + 1)
+
+    def test_insert_rows(self):
+        """Test Insert Rows.
+
+        Tests that rows inserted in bulk are written after the last row and
+        returned with their row IDs.
+        """
+        rows = self.sheet.insert_rows([{'col1': 'a'}, {'col1': 'b',
+                                                       'col3': 'c'}])
+        self.assertEqual([row['col1'] for row in rows], ['a', 'b'])
+        self.assertEqual(self.column()[5:8], ['r6c1', 'a', 'b'])
+        self.assertEqual(self.worksheet.get(8, 3), 'c')
+        self.assertEqual(self.sheet.get_rows()[-1], rows[-1])
+
+    def test_insert_rows_after_insert_row(self):
+        """Test Insert Rows After Insert Row.
+
+        Tests that a row inserted through the list feed after the cells are
+        loaded is not written over by a bulk insert.
+        """
+        self.sheet.cells
+        self.sheet.insert_row({'col1': 'via-list'})
+        self.sheet.insert_rows([{'col1': 'bulk'}])
+        self.assertEqual(self.column()[6:8], ['via-list', 'bulk'])
+
+    def test_insert_rows_lazy(self):
+        """Test Insert Rows Lazy.
+
+        Tests that inserting rows into a worksheet just opened does not load
+        every cell.
+        """
+        worksheet = self.service.add_worksheet(SPREADSHEET_KEY, 'large',
+                                               rows=1000, cols=10)
+        worksheet.resize(rows=1001)
+        sheet = Worksheet(self.service.client(), SPREADSHEET_KEY, 'large')
+        rows = sheet.insert_rows([{'col1': 'new'}])
+        self.assertEqual(rows[0]['col1'], 'new')
+        self.assertEqual(worksheet.get(1001, 1), 'new')
+        self.assertFalse(sheet._loaded)
+        # the whole worksheet is about 500kB
+        self.assertTrue(self.service.bytes_received < 50000)
+
+    def test_insert_rows_full_gap(self):
+        """Test Insert Rows Full Gap.
+
+        Tests that rows are not written over the rows below a blank row
+        they do not fit in.
+        """
+        for col in range(1, 4):
+            self.set_value(3, col, '')
+        with self.assertRaises(WorksheetException):
+            self.sheet.insert_rows([{'col1': 'a'}, {'col1': 'b'}])
+        self.assertEqual(self.column()[1:4], ['r2c1', '', 'r4c1'])
+
+    def test_delete_rows(self):
+        """Test Delete Rows.
+
+        Tests that deleting rows in the middle keeps the row IDs of the
+        rows below them, and that the rows at the end are blanked.
+        """
+        rows = self.sheet.get_rows()
+        writer = self.sheet.delete_rows([0, rows[2], rows[4]])
+        self.assertTrue(writer.ok)
+        self.assertEqual([row['col1'] for row in self.sheet.get_rows()],
+                         ['r3c1', 'r5c1'])
+        self.assertEqual(self.sheet.get_rows()[-1], rows[3])
+        self.assertEqual(self.column()[:4], ['col1', 'r3c1', 'r5c1', ''])
+
+    def test_refresh(self):
+        """Test Refresh.
+
+        Tests that only the cells changed on the server are fetched, and
+        merged into the loaded cells.
+        """
+        cell = self.sheet.find_cell(2, 1)
+        self.set_value(2, 1, 'changed')
+        changed = self.sheet.refresh()
+        self.assertEqual([(c.row, c.col) for c in changed], [(2, 1)])
+        self.assertTrue(self.sheet.find_cell(2, 1) is cell)
+        self.assertEqual(cell.value, 'changed')
+
+    def test_batch_diff(self):
+        """Test Batch Diff.
+
+        Tests that a diff batch only sends the cells whose value changes.
+        """
+        data = [['r2c1', 'new'], ['r3c1', 'r3c2']]
+        writer = self.sheet.batch((2, 1), (3, 2), data, diff=True)
+        self.assertEqual((writer.sent, writer.skipped), (1, 3))
+        self.assertEqual(self.worksheet.get(2, 2), 'new')
+        writer = self.sheet.batch((2, 1), (3, 2), data, diff=True)
+        self.assertEqual((writer.sent, writer.skipped), (0, 4))
+
+    def test_batch_error(self):
+        """Test Batch Error.
+
+        Tests that a failed batch raises and gives the cells their previous
+        values back, unless asked only to record it.
+        """
+        self.sheet.cells
+        self.service._batch = lambda *args: FakeResponse(500, b'boom')
+        with self.assertRaises(WorksheetException):
+            self.sheet.batch((2, 1), (2, 1), [['x']])
+        self.assertEqual(self.sheet.find_cell(2, 1).value, 'r2c1')
+        writer = self.sheet.batch((2, 1), (2, 1), [['x']],
+                                  raise_on_error=False)
+        self.assertFalse(writer.ok)
+
+    def test_write_cells_scattered(self):
+        """Test Write Cells Scattered.
+
+        Tests that cells far apart are loaded on their own, rather than as
+        the range between them.
+        """
+        worksheet = self.service.add_worksheet(
+            SPREADSHEET_KEY, 'wide', rows=500, cols=26,
+            values=lambda row, col: '')
+        sheet = Worksheet(self.service.client(), SPREADSHEET_KEY, 'wide')
+        self.service.reset_counters()
+        writer = sheet.write_cells({(1, 1): 'a', (500, 26): 'b'})
+        self.assertEqual(writer.sent, 2)
+        self.assertEqual([worksheet.get(1, 1), worksheet.get(500, 26)],
+                         ['a', 'b'])
+        self.assertEqual(len(sheet._loaded_index()), 2)
+        self.assertEqual(self.service.requests, 3)
+
+    def test_buffered_session(self):
+        """Test Buffered Session.
+
+        Tests that buffered writes to the same cell are coalesced and sent
+        with the buffered inserts when the session is closed.
+        """
+        rows = self.sheet.get_rows()
+        with self.sheet.buffered() as session:
+            session.update_cell(2, 1, 'first')
+            session.update_cell(2, 1, 'last')
+            session.update_row({ID_FIELD: rows[1][ID_FIELD], 'col2': 'x'})
+            session.insert_row({'col1': 'new'})
+            self.assertEqual(len(session), 3)
+        self.assertEqual(session.flushes, 1)
+        self.assertEqual(self.worksheet.get(2, 1), 'last')
+        self.assertEqual(self.worksheet.get(3, 2), 'x')
+        self.assertEqual(self.worksheet.get(7, 1), 'new')
+
+    def test_buffered_session_error(self):
+        """Test Buffered Session Error.
+
+        Tests that a flush raises if the server did not make its writes.
+        """
+        session = self.sheet.buffered()
+        session.update_cell(2, 1, 'x')
+        self.sheet._get_batch_url()
+        self.service._batch = lambda *args: FakeResponse(500, b'boom')
+        with self.assertRaises(WorksheetException):
+            session.flush()
+
+    def test_result_cache(self):
+        """Test Result Cache.
+
+        Tests that results are served from the cache, and that a row update
+        patches the cached result in use.
+        """
+        rows = self.sheet.get_rows()
+        queried = self.sheet.get_rows(query='col1 = "r3c1"')
+        self.service.reset_counters()
+        self.assertEqual(self.sheet.get_rows(query='col1 = "r3c1"'), queried)
+        self.assertEqual(self.sheet.get_rows(), rows)
+        self.assertEqual(self.service.requests, 0)
+        self.sheet.update_row_by_index(0, {'col2': 'x'})
+        self.assertEqual(self.sheet.get_rows()[0]['col2'], 'x')
+        self.assertEqual(self.service.requests, 1)
+
+    def test_result_cache_budget(self):
+        """Test Result Cache Budget.
+
+        Tests that the result in use is kept when it is larger than the
+        memory budget, so row updates do not fetch the list feed again.
+        """
+        sheet = self.open_sheet(results=ResultCache(max_bytes=1000))
+        rows = sheet.get_rows()
+        self.service.reset_counters()
+        for i in range(10):
+            sheet.update_row({ID_FIELD: rows[i % 5][ID_FIELD],
+                              'col2': str(i)})
+        self.assertEqual(self.service.requests, 10)
+        self.assertEqual(sheet.get_rows()[4]['col2'], '9')
+        self.assertEqual(self.service.requests, 10)
+        sheet.get_rows(query='col1 = "r2c1"')
+        self.assertEqual(len(sheet.results), 1)
+
+    def test_result_cache_expiry(self):
+        """Test Result Cache Expiry.
+
+        Tests that an expired result is fetched again.
+        """
+        now = [0]
+        sheet = self.open_sheet(results=ResultCache(ttl=10,
+                                                    clock=lambda: now[0]))
+        sheet.get_rows()
+        self.service.reset_counters()
+        sheet.get_rows()
+        self.assertEqual(self.service.requests, 0)
+        now[0] = 10
+        sheet.get_rows()
+        self.assertEqual(self.service.requests, 1)